@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) Bo Peng and the University of Texas MD Anderson Cancer Center
+# Distributed under the terms of the 3-clause BSD License.
+
+import os
+import tempfile
+from collections.abc import Iterable, Sequence
+from itertools import chain, islice
+
+import numpy as np
+import pandas as pd
+import scipy.io as sio
+
+
+def bundled(obj):
+    # if obj contains arrays, bytes, dicts, DataFrames or iterators that are saved to
+    # files, which are then sent in a single bundle instead of separate files for each
+    # of them
+    if isinstance(obj, (dict, np.ndarray, pd.DataFrame, pd.Series, pd.Index, bytes, bytearray, memoryview)):
+        return True
+    if isinstance(obj, (str, range)):
+        return False
+    if isinstance(obj, (Sequence, set)):
+        return any(bundled(x) for x in obj)
+    # iterators and generators are consumed into files
+    return isinstance(obj, Iterable)
+
+
+def matlab_str(string):
+    # MATLAB literal of a string
+    return "'" + str(string).replace("'", "''") + "'"
+
+
+def matlab_float(value):
+    # MATLAB literal of a float, which is read back to the same value
+    return {'inf': 'Inf', '-inf': '-Inf', 'nan': 'NaN'}.get(repr(value), repr(value))
+
+
+def matlab_cellstr(strings):
+    # MATLAB literal of a column cell array of strings
+    return '{' + ';'.join(matlab_str(x) for x in strings) + '}'
+
+
+MATLAB_DTYPES = {
+    'double': np.float64,
+    'single': np.float32,
+    'int8': np.int8,
+    'int16': np.int16,
+    'int32': np.int32,
+    'int64': np.int64,
+    'uint8': np.uint8,
+    'uint16': np.uint16,
+    'uint32': np.uint32,
+    'uint64': np.uint64,
+    'logical': np.bool_,
+}
+
+MATLAB_PRECISIONS = {np.dtype(v).str[1:]: k for k, v in MATLAB_DTYPES.items() if k != 'logical'}
+
+TICKS_PER_SECOND = {'s': 1, 'ms': 1000, 'us': 1000000, 'ns': 1000000000}
+
+
+class MatlabArray:
+    '''
+    Handle to a numeric array in MATLAB/Octave that is put to SoS without being
+    transferred. Indexing the handle with integers, slices, integer or boolean
+    arrays (which select along each dimension independently, as with np.ix_)
+    transfers only the selected block, and np.asarray(handle) transfers the
+    entire array. The handle refers to the MATLAB variable by name so it reflects
+    later changes to the variable in MATLAB.
+    '''
+
+    def __init__(self, client, name, shape, dtype):
+        self._client = client
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f'MatlabArray({self.name!r}, shape={self.shape}, dtype={self.dtype})'
+
+    def __array__(self, dtype=None, copy=None):
+        return self[...].astype(dtype, copy=False) if dtype is not None else self[...]
+
+    def _index(self, key):
+        # MATLAB index expressions, length of selected dimensions, and the shape of result
+        if not isinstance(key, tuple):
+            key = (key,)
+        ellipsis = [i for i, k in enumerate(key) if k is Ellipsis]
+        if ellipsis:
+            key = key[:ellipsis[0]] + (slice(None),) * (self.ndim - len(key) + 1) + key[ellipsis[0] + 1:]
+        if len(key) > self.ndim:
+            raise IndexError(f'too many indices for array: array is {self.ndim}-dimensional, '
+                             f'but {len(key)} were indexed')
+        key = key + (slice(None),) * (self.ndim - len(key))
+        indexes, lengths, shape = [], [], []
+        for k, n in zip(key, self.shape):
+            if isinstance(k, slice):
+                r = range(*k.indices(n))
+                indexes.append(f'{r[0] + 1}:{r.step}:{r[-1] + 1}' if r else '[]')
+                lengths.append(len(r))
+                shape.append(len(r))
+            elif isinstance(k, (int, np.integer)):
+                if not -n <= k < n:
+                    raise IndexError(f'index {k} is out of bounds for axis with size {n}')
+                indexes.append(str(k % n + 1))
+                lengths.append(1)
+            else:
+                idx = np.asarray(k)
+                if idx.dtype == np.bool_:
+                    idx = np.flatnonzero(idx)
+                if idx.ndim != 1 or idx.dtype.kind not in 'iu':
+                    raise IndexError('only integers, slices, and 1-d integer or boolean arrays are valid indices')
+                if len(idx) and (idx.min() < -n or idx.max() >= n):
+                    raise IndexError(f'index out of bounds for axis with size {n}')
+                indexes.append('[' + ','.join(str(x % n + 1) for x in idx) + ']')
+                lengths.append(len(idx))
+                shape.append(len(idx))
+        return indexes, lengths, shape
+
+    def __getitem__(self, key):
+        indexes, lengths, shape = self._index(key)
+        if 0 in lengths:
+            return np.empty(shape, dtype=self.dtype)
+        filename = os.path.join(tempfile.gettempdir(), 'block2py.mat')
+        reply = self._client.execute_interactive(
+            f"sos_save_block('{filename}', {self.name}, {', '.join(indexes)})",
+            store_history=False,
+            output_hook=lambda msg: None)
+        if reply['content']['status'] != 'ok':
+            raise RuntimeError(f'Failed to retrieve block of {self.name}: {reply["content"].get("evalue", "")}')
+        # imported here as kernel imports this module
+        from .kernel import loadmat_array
+        return loadmat_array(filename).astype(self.dtype, copy=False).reshape(shape)
+
+
+class MatlabCodec:
+    '''
+    Encoding of Python objects that are sent to MATLAB/Octave as bundles of nested
+    containers, compact expressions, exact literals and streams of iterators. The
+    methods are used by sos_MATLAB, which provides options, capabilities() and
+    _Matlab_repr().
+    '''
+
+    def _bundle_repr(self, obj, filename='bundle2mtlb.mat'):
+        # nested containers are saved with all their leaves to a single .mat file, which
+        # is loaded by sos_load_bundle to rebuild the struct and cell arrays
+        dic = tempfile.tempdir
+        sio.savemat(os.path.join(dic, filename), {'obj': self._bundle_value(obj)})
+        return 'sos_load_bundle(fullfile(' + '\'' + dic + '\'' + ',' \
+            + '\'' + filename + '\'))'
+
+    def _bundle_value(self, obj, row=False):
+        # Converts obj to values that can be saved by sio.savemat. dicts are saved as
+        # structs, and sequences and sets as cell arrays, or as vectors if they contain
+        # only numbers. Sequences are columns as with _Matlab_repr, except in structs
+        # (row=True) where they are rows as saved by savemat. Values that savemat cannot
+        # save as MATLAB types are saved as structs with a sos_type field, which are
+        # converted by sos_load_bundle.
+        if obj is None:
+            return np.nan
+        if isinstance(obj, (bool, np.bool_)):
+            return {'sos_type': 'logical', 'values': np.uint8(obj)}
+        if isinstance(obj, (int, float, str, complex, np.number)):
+            return obj
+        if isinstance(obj, dict):
+            return {str(k): self._bundle_value(v, row=True) for k, v in obj.items()}
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            # uint8 column vectors, or typed arrays according to the format of memoryviews
+            values = np.asarray(obj) if isinstance(obj, memoryview) else np.frombuffer(obj, dtype=np.uint8)
+            return self._bundle_value(values.reshape(-1, 1) if values.ndim == 1 else values)
+        if isinstance(obj, pd.DataFrame):
+            if not self.capabilities().get('istable', False):
+                # saved as a struct of columns without table support
+                return {str(k): self._bundle_column(obj[k]) for k in obj.columns}
+            return {
+                'sos_type': 'table',
+                'names': self._cell([str(x) for x in obj.columns]),
+                'columns': self._cell([self._bundle_column(obj.iloc[:, i]) for i in range(obj.shape[1])]),
+            }
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return self._bundle_column(obj)
+        if isinstance(obj, np.ndarray):
+            obj = np.asarray(obj)
+            if obj.dtype.kind == 'b':
+                return {'sos_type': 'logical', 'values': obj.view(np.uint8)}
+            if obj.dtype.kind in 'iufcU':
+                return obj
+            values = np.empty(obj.shape, dtype=object)
+            for idx, value in np.ndenumerate(obj):
+                values[idx] = self._bundle_value(value, row)
+            return values
+        if isinstance(obj, Iterable):
+            items = list(obj)
+            if not items:
+                return np.zeros((0, 0))
+            if not isinstance(obj, (Sequence, set)):
+                # items of iterators are saved as rows of a typed array, as by _stream_repr
+                try:
+                    values = np.asarray(items)
+                except ValueError:
+                    values = None
+                if values is not None and values.dtype.kind in 'biuf' and values.ndim <= 2:
+                    return self._bundle_value(values.reshape(len(items), -1))
+            if all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in items):
+                return np.array(items, dtype=float if any(isinstance(x, float) for x in items) else None) \
+                    .reshape((1, -1) if row else (-1, 1))
+            return self._cell([self._bundle_value(x, row) for x in items], row)
+        return repr(obj)
+
+    def _bundle_column(self, col):
+        # column of a DataFrame, or values of a Series or Index, as a column vector
+        dtype = col.dtype
+        if isinstance(dtype, pd.CategoricalDtype) and self.capabilities().get('categorical', False):
+            return {
+                'sos_type': 'categorical',
+                'codes': np.asarray(col.cat.codes if isinstance(col, pd.Series) else col.codes).reshape(-1, 1),
+                'categories': self._cell([str(x) for x in dtype.categories]),
+                'ordinal': np.uint8(dtype.ordered),
+            }
+        if (pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype)) \
+                and self.capabilities().get('datetime', False):
+            values = col.array
+            tz = getattr(dtype, 'tz', None)
+            return {
+                'sos_type': 'duration' if values.dtype.kind == 'm' else 'datetime',
+                'ticks': values.asi8.reshape(-1, 1),
+                'ticks_per_second': float(TICKS_PER_SECOND[values.unit]),
+                'time_zone': '' if tz is None else str(tz),
+            }
+        values = col.to_numpy()
+        if values.dtype.kind == 'O' and all(isinstance(x, str) for x in values):
+            return self._cell(list(values))
+        return self._bundle_value(values.reshape(-1, 1))
+
+    @staticmethod
+    def _cell(items, row=False):
+        # column, or row if row=True, cell array of items
+        cell = np.empty((len(items), 1), dtype=object)
+        for i, item in enumerate(items):
+            cell[i, 0] = item
+        return cell.T if row else cell
+
+    def _symbolic_repr(self, obj):
+        # Compact MATLAB expressions for real numeric or boolean arrays that are constant,
+        # arithmetic progressions with integer start and step, or multiples of identity
+        # matrices, which are exactly what sos_load_obj would return for obj (1-d arrays
+        # as row vectors). Returns None if obj does not follow any of these patterns.
+        if not self.options.get('symbolic_encoding', True) or obj.dtype.kind not in 'biuf' or \
+                obj.size < 3 or obj.dtype.str[1:] not in MATLAB_PRECISIONS and obj.dtype.kind != 'b':
+            return None
+        mclass = 'logical' if obj.dtype.kind == 'b' else MATLAB_PRECISIONS[obj.dtype.str[1:]]
+        shape = obj.shape if obj.ndim > 1 else (1, obj.size)
+        dims = '[' + ' '.join(str(x) for x in shape) + ']'
+
+        def literal(value):
+            if obj.dtype.kind == 'f':
+                return repr(float(value))
+            # integers larger than flintmax cannot be written as literals
+            return str(int(value)) if abs(int(value)) < 2**53 else None
+
+        first = obj.flat[0]
+        if obj.dtype.kind == 'f' and np.isnan(first):
+            return f"nan({dims}, '{mclass}')" if np.isnan(obj).all() else None
+        if (obj == first).all():
+            if mclass == 'logical':
+                return f'{"true" if first else "false"}({dims})'
+            if first == 0 or first == 1:
+                return f"{'zeros' if first == 0 else 'ones'}({dims}, '{mclass}')"
+            value = literal(first)
+            return None if value is None else f'repmat({mclass}({value}), {dims})'
+        if obj.ndim == 1 and mclass != 'logical':
+            start, last = literal(obj[0]), literal(obj[-1])
+            if start is None or last is None:
+                return None
+            # differences of integers are computed as int64 because they wrap around
+            # in unsigned and narrow integer types
+            values = obj.astype(np.int64) if obj.dtype.kind in 'iu' else obj
+            step = values[1] - values[0]
+            if obj.dtype.kind == 'f' and not (float(obj[0]).is_integer() and float(step).is_integer()):
+                return None
+            if not (np.diff(values) == step).all():
+                return None
+            return f'{mclass}({start}:{literal(step)}:{last})'
+        if obj.ndim == 2 and obj.shape[0] == obj.shape[1] and mclass != 'logical':
+            diag = np.diagonal(obj)
+            value = literal(diag[0])
+            if value is None or not (diag == diag[0]).all() or np.count_nonzero(obj) != np.count_nonzero(diag):
+                return None
+            return f"{mclass}({value}) * eye({obj.shape[0]}, '{mclass}')"
+        return None
+
+    def _inline_repr(self, obj):
+        # Exact MATLAB literal of a real numeric or boolean array with at most
+        # options['inline_size'] values (1-d arrays as row vectors), or None if obj is
+        # larger or its values cannot be written exactly as literals
+        if obj.size == 0 or obj.size > self.options.get('inline_size', 256):
+            return None
+        if obj.dtype.kind == 'b':
+            mclass = 'logical'
+        elif obj.dtype.kind in 'iuf' and obj.dtype.str[1:] in MATLAB_PRECISIONS:
+            mclass = MATLAB_PRECISIONS[obj.dtype.str[1:]]
+        else:
+            return None
+        values = obj.ravel(order='F').tolist()
+        if obj.dtype.kind in 'iu':
+            # literals are read as doubles before they are converted to integers
+            if obj.dtype.itemsize == 8 and any(abs(x) > 2 ** 53 for x in values):
+                return None
+            literal = '[' + ' '.join(str(x) for x in values) + ']'
+        elif obj.dtype.kind == 'b':
+            literal = '[' + ' '.join('1' if x else '0' for x in values) + ']'
+        else:
+            literal = '[' + ' '.join(matlab_float(x) for x in values) + ']'
+        if mclass != 'double':
+            literal = f'{mclass}({literal})'
+        if obj.ndim > 1:
+            literal = f"reshape({literal}, [{' '.join(str(x) for x in obj.shape)}])"
+        return literal
+
+    def _inline_value(self, obj, remaining):
+        # Exact MATLAB literal of a value of a dict, or a dict as a struct, with the same
+        # types as _bundle_repr, or None if obj cannot be written as a literal or has
+        # more values than remaining[0], which is reduced by the number of values
+        if isinstance(obj, dict):
+            fields = []
+            for key, value in obj.items():
+                if not isinstance(key, str) or not key.isidentifier() or not key.isascii() \
+                        or key.startswith('_') or len(key) > 63:
+                    return None
+                literal = self._inline_value(value, remaining)
+                if literal is None:
+                    return None
+                fields.append(f"'{key}', {{{literal}}}")
+            return 'struct(' + ', '.join(fields) + ')'
+        remaining[0] -= obj.size if isinstance(obj, np.ndarray) else 1
+        if remaining[0] < 0:
+            return None
+        if obj is None:
+            return 'NaN'
+        if isinstance(obj, (bool, np.bool_)):
+            return 'true' if obj else 'false'
+        if isinstance(obj, (int, np.integer)):
+            if abs(int(obj)) > 2 ** 53:
+                return None
+            return f"{'int64' if isinstance(obj, int) else MATLAB_PRECISIONS[obj.dtype.str[1:]]}({obj})"
+        if isinstance(obj, float):
+            return matlab_float(obj)
+        if isinstance(obj, np.floating) and obj.dtype.str[1:] in MATLAB_PRECISIONS:
+            return f'{MATLAB_PRECISIONS[obj.dtype.str[1:]]}({matlab_float(float(obj))})'
+        if isinstance(obj, complex):
+            return f'complex({matlab_float(obj.real)}, {matlab_float(obj.imag)})'
+        if isinstance(obj, str):
+            return None if '\n' in obj or '\r' in obj else matlab_str(obj)
+        if isinstance(obj, np.ndarray) and not isinstance(obj, np.matrix):
+            return self._inline_repr(obj)
+        return None
+
+    def _stream_repr(self, items):
+        # Consume an iterator in chunks into a binary file with type and number of
+        # columns determined by the first chunk, so that memory usage is bounded
+        # by chunk size. Strings are sent as a cell array of strings, and other items
+        # that are not numbers or 1-d arrays as a list.
+        chunk_size = self.options.get('stream_chunk_size', 65536)
+        first = list(islice(items, chunk_size))
+        if not first:
+            return '[]'
+        try:
+            chunk = np.asarray(first)
+        except ValueError:
+            chunk = np.asarray(first, dtype=object)
+        if chunk.dtype.kind not in 'biuf' or chunk.ndim > 2:
+            rest = list(chain(first, items))
+            if all(isinstance(x, str) for x in rest):
+                return matlab_cellstr(rest)
+            return self._Matlab_repr(rest)
+        dtype = chunk.dtype.newbyteorder('<')
+        if dtype.kind == 'f' and dtype.str[1:] not in MATLAB_PRECISIONS:
+            # float16 values are sent as doubles, as by savemat
+            dtype = np.dtype('<f8')
+        item_shape = chunk.shape[1:]
+        dic = tempfile.tempdir
+        with open(os.path.join(dic, 'iter2mtlb.bin'), 'wb') as out:
+            while True:
+                if chunk.dtype != dtype and not np.can_cast(chunk.dtype, dtype, 'same_kind'):
+                    raise ValueError(f'Items of iterator changed from {dtype} to {chunk.dtype}')
+                if chunk.shape[1:] != item_shape:
+                    raise ValueError(f'Items of iterator changed from shape {item_shape} to {chunk.shape[1:]}')
+                chunk.astype(dtype, copy=False).tofile(out)
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    break
+                chunk = np.asarray(chunk)
+        precision = 'uint8' if dtype.kind == 'b' else MATLAB_PRECISIONS[dtype.str[1:]]
+        columns = item_shape[0] if item_shape else 1
+        return f"sos_load_stream(fullfile('{dic}', 'iter2mtlb.bin'), '{precision}', {columns}, " \
+            f"{'true' if dtype.kind == 'b' else 'false'})"
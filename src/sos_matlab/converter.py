@@ -1,11 +1,148 @@
 import argparse
-import re
+import glob
+import hashlib
+import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import nbformat
 from nbformat.v4 import new_code_cell, new_notebook
 from sos.utils import env
 
+MANIFEST_FILE = '.sos_convert_manifest.json'
+
+
+def notebook_metadata(kernel, use_sos):
+    '''Notebook level metadata for a notebook using the specified kernel'''
+    metadata = {}
+    if use_sos:
+        if kernel == 'octave':
+            kernelspec = ["Octave", "octave", "Octave", "#dff8fb", ""]
+        else:
+            kernelspec = ["MATLAB", "matlab", "MATLAB", "#dff8fb", ""]
+        metadata = {
+            'kernelspec': {
+                "display_name": "SoS",
+                "language": "sos",
+                "name": "sos"
+            },
+            "language_info": {
+                'codemirror_mode': 'sos',
+                "file_extension": ".sos",
+                "mimetype": "text/x-sos",
+                "name": "sos",
+                "pygments_lexer": "python",
+                'nbconvert_exporter': 'sos_notebook.converter.SoS_Exporter',
+            },
+            'sos': {
+                'kernels': [['SoS', 'sos', '', ''], kernelspec]
+            }
+        }
+    elif kernel == 'octave':
+        metadata = {
+            "kernelspec": {
+                "display_name": "Octave",
+                "language": "octave",
+                "name": "octave"
+            },
+            "language_info": {
+                "file_extension": ".m",
+                "help_links": [{
+                    "text":
+                        "GNU Octave",
+                    "url":
+                        "https://www.gnu.org/software/octave/support.html"
+                }, {
+                    "text": "Octave Kernel",
+                    "url": "https://github.com/Calysto/octave_kernel"
+                }, {
+                    "text":
+                        "MetaKernel Magics",
+                    "url":
+                        "https://metakernel.readthedocs.io/en/latest/source/README.html"
+                }],
+                "mimetype": "text/x-octave",
+                "name": "octave",
+                "version": "6.2.0"
+            }
+        }
+    else:
+        metadata = {
+            "kernelspec": {
+                "display_name": "Matlab",
+                "language": "matlab",
+                "name": "matlab"
+            },
+            "language_info": {
+                "codemirror_mode": "octave",
+                "file_extension": ".m",
+                "help_links": [{
+                    "text":
+                        "MetaKernel Magics",
+                    "url":
+                        "https://github.com/calysto/metakernel/blob/master/metakernel/magics/README.md"
+                }],
+                "mimetype": "text/x-matlab",
+                "name": "matlab",
+                "version": "0.14.3"
+            }
+        }
+
+    return metadata
+
+
+def iter_cell_sources(src):
+    '''
+    Read a .m script line by line and yield the source of cells that are
+    separated by one or more blank lines, so that the entire script does not
+    have to be held in memory.
+    '''
+    lines = []
+    for line in src:
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            yield ''.join(lines).rstrip()
+            lines = []
+    if lines:
+        yield ''.join(lines).rstrip()
+
+
+def write_notebook(cell_sources, metadata, notebook, cell_metadata=None):
+    '''
+    Write a notebook in nbformat 4 to an open file, one cell at a time, with
+    the same layout as nbformat.write.
+    '''
+    dump_args = dict(indent=1, sort_keys=True, separators=(',', ': '), ensure_ascii=False)
+    notebook.write('{\n "cells": [')
+    for count, source in enumerate(cell_sources):
+        cell = new_code_cell(source=source.splitlines(True), execution_count=count + 1, metadata=cell_metadata or {})
+        notebook.write(('\n  ' if count == 0 else ',\n  ') + json.dumps(cell, **dump_args).replace('\n', '\n  '))
+    notebook.write('\n ],\n "metadata": ')
+    notebook.write(json.dumps(metadata, **dump_args).replace('\n', '\n '))
+    notebook.write(f',\n "nbformat": 4,\n "nbformat_minor": {nbformat.v4.nbformat_minor}\n}}\n')
+
+
+def convert_script(script_file, notebook_file, kernel='octave', use_sos=False):
+    '''Convert a single .m script to a notebook file, streaming its content'''
+    with open(script_file, 'r') as src, open(notebook_file, 'w') as notebook:
+        write_notebook(
+            iter_cell_sources(src),
+            notebook_metadata(kernel, use_sos),
+            notebook,
+            cell_metadata={'kernel': 'SoS'} if use_sos else None)
+    return notebook_file
+
+
+def file_signature(filename, options):
+    '''Hash of the content of a file and the conversion options'''
+    sig = hashlib.sha1(json.dumps(options, sort_keys=True).encode())
+    with open(filename, 'rb') as src:
+        for block in iter(lambda: src.read(1 << 20), b''):
+            sig.update(block)
+    return sig.hexdigest()
+
 
 class OctaveToNotebookConverter(object):
 
@@ -13,7 +150,10 @@ class OctaveToNotebookConverter(object):
         parser = argparse.ArgumentParser(
             'sos convert FILE.m FILE.ipynb (or --to ipynb)',
             description='''Convert an Octave or Matlab .m script to Jupyter notebook (.ipynb)
-                so that it can be opened by Jupyter notebook.''')
+                so that it can be opened by Jupyter notebook. If FILE.m is a quoted wildcard
+                pattern (e.g. "src/*.m", or "src/**/*.m" for all .m files under directory
+                src), all matching files are converted to notebooks under directory
+                FILE.ipynb, which requires option --to ipynb.''')
         parser.add_argument(
             '--kernel',
             choices={'matlab', 'octave'},
@@ -24,106 +164,103 @@ class OctaveToNotebookConverter(object):
             action='store_true',
             help='''generate a sos notebook (with octave or matlab as a subkernel),
                 or a Notebook using Octave or Matlab kernel directly.''')
+        parser.add_argument(
+            '-j',
+            '--jobs',
+            type=int,
+            help='''Number of processes used to convert multiple scripts, default
+                to the number of CPUs.''')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='''Convert all scripts in batch mode even if they have not been
+                changed since the last conversion.''')
         return parser
 
     def convert(self, script_file, notebook_file, args=None, unknown_args=None):
         '''
-        Convert a .m script to a Jupyter notebook with a single cell.
+        Convert a .m script to a Jupyter notebook with cells separated by blank lines,
+        or all .m scripts matching a wildcard pattern to notebooks. Directories are not
+        accepted because sos convert chooses converters by the extension of the source,
+        so "dir/**/*.m" should be used to convert all scripts under dir.
         '''
         if unknown_args:
             raise ValueError(f'Unrecognized parameter {unknown_args}')
-        with open(script_file, 'r') as src:
-            metainfo = {}
-            if args.use_sos:
-                metainfo = {'kernel': 'SoS'}
-
-            cells = [
-                new_code_cell(
-                    source=line.rstrip(),
-                    execution_count=count + 1,
-                    metadata=metainfo)
-                for count, line in enumerate(re.split(r'\n\s*\n', src.read()))
-            ]
-
-        #
-        metadata = {}
-        if args.use_sos:
-            if args.kernel == 'octave':
-                kernelspec = ["Octave", "octave", "Octave", "#dff8fb", ""]
-            else:
-                kernelspec = ["MATLAB", "matlab", "MATLAB", "#dff8fb", ""]
-            metadata = {
-                'kernelspec': {
-                    "display_name": "SoS",
-                    "language": "sos",
-                    "name": "sos"
-                },
-                "language_info": {
-                    'codemirror_mode': 'sos',
-                    "file_extension": ".sos",
-                    "mimetype": "text/x-sos",
-                    "name": "sos",
-                    "pygments_lexer": "python",
-                    'nbconvert_exporter': 'sos_notebook.converter.SoS_Exporter',
-                },
-                'sos': {
-                    'kernels': [['SoS', 'sos', '', ''], kernelspec]
-                }
-            }
-        elif args.kernel == 'octave':
-            metadata = {
-                "kernelspec": {
-                    "display_name": "Octave",
-                    "language": "octave",
-                    "name": "octave"
-                },
-                "language_info": {
-                    "file_extension": ".m",
-                    "help_links": [{
-                        "text":
-                            "GNU Octave",
-                        "url":
-                            "https://www.gnu.org/software/octave/support.html"
-                    }, {
-                        "text": "Octave Kernel",
-                        "url": "https://github.com/Calysto/octave_kernel"
-                    }, {
-                        "text":
-                            "MetaKernel Magics",
-                        "url":
-                            "https://metakernel.readthedocs.io/en/latest/source/README.html"
-                    }],
-                    "mimetype": "text/x-octave",
-                    "name": "octave",
-                    "version": "6.2.0"
-                }
-            }
-        else:
-            metadata = {
-                "kernelspec": {
-                    "display_name": "Matlab",
-                    "language": "matlab",
-                    "name": "matlab"
-                },
-                "language_info": {
-                    "codemirror_mode": "octave",
-                    "file_extension": ".m",
-                    "help_links": [{
-                        "text":
-                            "MetaKernel Magics",
-                        "url":
-                            "https://github.com/calysto/metakernel/blob/master/metakernel/magics/README.md"
-                    }],
-                    "mimetype": "text/x-matlab",
-                    "name": "matlab",
-                    "version": "0.14.3"
-                }
-            }
+        if glob.has_magic(script_file):
+            return self.convert_batch(script_file, notebook_file, args)
 
-        nb = new_notebook(cells=cells, metadata=metadata)
         if not notebook_file:
+            with open(script_file, 'r') as src:
+                cells = [
+                    new_code_cell(
+                        source=source,
+                        execution_count=count + 1,
+                        metadata={'kernel': 'SoS'} if args.use_sos else {})
+                    for count, source in enumerate(iter_cell_sources(src))
+                ]
+            nb = new_notebook(cells=cells, metadata=notebook_metadata(args.kernel, args.use_sos))
             nbformat.write(nb, sys.stdout, 4)
         else:
-            with open(notebook_file, 'w') as notebook:
-                nbformat.write(nb, notebook, 4)
+            convert_script(script_file, notebook_file, args.kernel, args.use_sos)
             env.logger.info(f'Jupyter notebook saved to {notebook_file}')
+
+    def convert_batch(self, scripts, notebook_dir, args=None):
+        '''
+        Convert all .m scripts matching pattern `scripts` to notebooks under
+        `notebook_dir`, preserving their directory structure relative to the leading
+        directories of the pattern without wildcards.
+        Scripts are converted in parallel, and scripts that have not changed since
+        the last conversion with the same options, as recorded in a manifest file
+        under `notebook_dir`, are skipped.
+        '''
+        if not notebook_dir:
+            raise ValueError('An output directory is required to convert multiple scripts.')
+        script_files = [x for x in glob.glob(scripts, recursive=True) if os.path.isfile(x)]
+        root = scripts
+        while glob.has_magic(root):
+            root = os.path.dirname(root)
+        root = root or '.'
+        if not script_files:
+            env.logger.warning(f'No .m script is found from {scripts}')
+            return
+
+        options = {'kernel': args.kernel, 'use_sos': args.use_sos}
+        manifest_file = os.path.join(notebook_dir, MANIFEST_FILE)
+        manifest = {}
+        if os.path.isfile(manifest_file) and not getattr(args, 'force', False):
+            with open(manifest_file) as mf:
+                manifest = json.load(mf)
+
+        tasks = {}
+        new_manifest = {}
+        for script_file in sorted(script_files):
+            rel_path = os.path.relpath(script_file, root)
+            notebook_file = os.path.join(notebook_dir, os.path.splitext(rel_path)[0] + '.ipynb')
+            signature = file_signature(script_file, options)
+            new_manifest[rel_path] = signature
+            if manifest.get(rel_path) == signature and os.path.isfile(notebook_file):
+                continue
+            os.makedirs(os.path.dirname(notebook_file) or '.', exist_ok=True)
+            tasks[rel_path] = (script_file, notebook_file)
+
+        failed = []
+        with ProcessPoolExecutor(max_workers=getattr(args, 'jobs', None)) as executor:
+            futures = {
+                rel_path: executor.submit(convert_script, script_file, notebook_file, args.kernel, args.use_sos)
+                for rel_path, (script_file, notebook_file) in tasks.items()
+            }
+            for rel_path, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    env.logger.warning(f'Failed to convert {tasks[rel_path][0]}: {e}')
+                    new_manifest.pop(rel_path)
+                    failed.append(rel_path)
+
+        with open(manifest_file, 'w') as mf:
+            json.dump(new_manifest, mf, indent=1, sort_keys=True)
+        env.logger.info(
+            f'{len(tasks) - len(failed)} of {len(script_files)} scripts converted to notebooks under {notebook_dir}'
+            f' ({len(script_files) - len(tasks)} unchanged, {len(failed)} failed)')
+        if failed:
+            raise RuntimeError(f'Failed to convert {len(failed)} scripts')
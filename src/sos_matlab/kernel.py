@@ -4,14 +4,24 @@
 # Distributed under the terms of the 3-clause BSD License.
 
 import csv
+import hashlib
+import json
 import os
+import pickle
+import sys
 import tempfile
-from collections.abc import Sequence
+import tracemalloc
+from collections.abc import Iterable, Sequence
+from contextlib import contextmanager, nullcontext
 
 import numpy as np
 import pandas as pd
 import scipy.io as sio
-from sos.utils import env
+from sos.utils import env, pretty_size
+
+from .codec import (MATLAB_DTYPES, MATLAB_PRECISIONS, TICKS_PER_SECOND, MatlabArray, MatlabCodec, bundled,
+                    matlab_cellstr, matlab_str)
+from .pool import warm_pool
 
 
 def homogeneous_type(seq):
@@ -22,23 +32,316 @@ def homogeneous_type(seq):
     return True if all(isinstance(x, first_type) for x in iseq) else False
 
 
+def categorical_columns(df, categoricals):
+    # restore categorical columns of a DataFrame, which are transferred from MATLAB
+    # as 0-based codes (NaN for undefined) with categories and ordinal flags
+    for name, (categories, ordered) in categoricals.items():
+        codes = df[name].fillna(-1).astype(int)
+        df[name] = pd.Categorical.from_codes(codes, categories=categories, ordered=ordered)
+    return df
+
+
+def temporal_columns(df, filename, temporals):
+    # restore datetime and duration columns of a DataFrame, which are transferred from
+    # MATLAB as int64 nanoseconds since epoch (or nanoseconds) in a .mat file
+    data = sio.loadmat(filename)
+    for name, (idx, kind, tz) in temporals.items():
+        ticks = data[f'c{idx}'].ravel().astype(np.int64)
+        if kind == 'duration':
+            df[name] = ticks.view('timedelta64[ns]')
+        elif tz:
+            df[name] = pd.DatetimeIndex(ticks.view('datetime64[ns]')).tz_localize('UTC').tz_convert(tz)
+        else:
+            df[name] = ticks.view('datetime64[ns]')
+    return df
+
+
+def block_hashes(arr, block_size):
+    # memory order of the array, and hashes of consecutive blocks of block_size elements
+    order = 'F' if arr.flags.f_contiguous and not arr.flags.c_contiguous else 'C'
+    mem = arr.ravel(order=order)
+    return order, [hashlib.blake2b(mem[i:i + block_size]).digest() for i in range(0, mem.size, block_size)]
+
+
+def object_size(obj):
+    # estimated size of obj in bytes, without copying or converting it
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=False, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, memoryview):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(object_size(x) for x in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(object_size(x) for x in obj)
+    return sys.getsizeof(obj)
+
+
+def peak_rss():
+    # peak resident set size of the current process since it was started, in bytes, or
+    # None if unavailable. It is not reset between transfers.
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@contextmanager
+def traced_memory():
+    # peak memory allocated by Python (and numpy) while the block is executed
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    stats = {}
+    try:
+        yield stats
+    finally:
+        stats['peak'] = max(tracemalloc.get_traced_memory()[1] - base, 0)
+        if started:
+            tracemalloc.stop()
+
+
+def object_digest(obj, chunk_size=1048576):
+    # Digest of the content of a Python object, or None if it cannot be hashed. Arrays
+    # are hashed from their buffers, or in chunks of chunk_size values if they are not
+    # contiguous, and DataFrames by their hashed rows, so they are not copied as a whole.
+    digest = hashlib.blake2b(type(obj).__name__.encode())
+    try:
+        if isinstance(obj, np.ndarray) and obj.dtype.kind != 'O':
+            digest.update(f'{obj.dtype.str}{obj.shape}'.encode())
+            if obj.flags.c_contiguous or obj.flags.f_contiguous:
+                # buffer of the array, in its memory order
+                digest.update((obj if obj.flags.c_contiguous else obj.T).reshape(-1).view(np.uint8))
+            else:
+                for start in range(0, obj.size, chunk_size):
+                    chunk = obj[np.unravel_index(np.arange(start, min(start + chunk_size, obj.size)), obj.shape)]
+                    digest.update(np.ascontiguousarray(chunk).view(np.uint8))
+        elif isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+            if isinstance(obj, pd.DataFrame):
+                meta = (list(obj.columns), [str(x) for x in obj.dtypes])
+            else:
+                meta = (obj.name, str(obj.dtype))
+            digest.update(pickle.dumps((meta, obj.shape)))
+            digest.update(pd.util.hash_pandas_object(obj, index=not isinstance(obj, pd.Index)).to_numpy())
+        elif isinstance(obj, dict):
+            for key, value in obj.items():
+                digest.update(object_digest(key) + object_digest(value))
+        elif isinstance(obj, (list, tuple)):
+            for value in obj:
+                digest.update(object_digest(value))
+        else:
+            digest.update(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+    return digest.digest()
+
+
+def matlab_fingerprint(arr, chunk_size=1048576):
+    # sos_fingerprint of real numeric or boolean array arr after it is sent to MATLAB
+    # (1-d arrays as row vectors), which hashes chunks of values in column-major order
+    shape = arr.shape if arr.ndim > 1 else (1, arr.size)
+    mclass = 'logical' if arr.dtype.kind == 'b' else MATLAB_PRECISIONS[arr.dtype.str[1:]]
+    dtype = np.dtype(np.uint8) if arr.dtype.kind == 'b' else arr.dtype.newbyteorder('<')
+    # a view of the values in column-major order without copying, if possible
+    flat = arr.T.reshape(-1) if arr.flags.f_contiguous else None
+    hashes = []
+    for start in range(0, arr.size, chunk_size):
+        if flat is not None:
+            chunk = flat[start:start + chunk_size]
+        else:
+            index = np.unravel_index(np.arange(start, min(start + chunk_size, arr.size)), arr.shape, order='F')
+            chunk = arr[index]
+        hashes.append(hashlib.md5(np.ascontiguousarray(chunk.astype(dtype, copy=False))).hexdigest())
+    digest = hashlib.md5(''.join(hashes).encode()).hexdigest()
+    return mclass + ''.join(f'_{x}' for x in shape) + '_' + digest
+
+
+def loadmat_array(filename, matrix=False):
+    # array saved by MATLAB, which is loaded in column-major order without copying,
+    # and converted to a C-contiguous array unless option array_order is 'F'
+    arr = sio.loadmat(filename)['obj']
+    if sos_MATLAB.options.get('array_order', 'C') == 'C':
+        arr = np.ascontiguousarray(arr)
+    return np.matrix(arr, copy=False) if matrix else arr
+
+
+def inline_array(values, shape, dtype, matrix=False):
+    # array from values of a small MATLAB array in column-major order, which has the
+    # same memory layout as arrays returned by loadmat_array
+    data = np.array(values, dtype=dtype).reshape(shape, order='F')
+    if sos_MATLAB.options.get('array_order', 'C') == 'C':
+        data = np.ascontiguousarray(data)
+    return np.matrix(data, copy=False) if matrix else data
+
+
+def uint8_array(source, shape):
+    # uint8 arrays from MATLAB, as bytes of values in column-major order or saved as raw
+    # bytes to file source, which is removed after it is read. They are returned as
+    # bytes for vectors (unless option uint8_as_bytes is unset) or as np.uint8 arrays
+    if isinstance(source, bytes):
+        data = np.frombuffer(source, dtype=np.uint8).copy()
+    else:
+        data = np.fromfile(source, dtype=np.uint8)
+        os.remove(source)
+    if len(shape) == 2 and 1 in shape:
+        return data.tobytes() if sos_MATLAB.options.get('uint8_as_bytes', True) else data
+    data = data.reshape(shape, order='F')
+    return np.ascontiguousarray(data) if sos_MATLAB.options.get('array_order', 'C') == 'C' else data
+
+
 Matlab_init_statements = rf'''
 path(path, {os.path.split(__file__)[0]!r})
 '''
 
 
-class sos_MATLAB:
+def kernel_init_statements(kernel_name):
+    # statements to initialize a new kernel, which are also used for kernels in warm pool
+    if kernel_name == 'octave':
+        return Matlab_init_statements + 'pkg load dataframe\n'
+    return Matlab_init_statements
+
+
+def pool_sizes(spec):
+    # number of kernels to keep in warm pool for each kernel spec, from a specification
+    # such as "octave:2,matlab:1"
+    sizes = {}
+    for item in spec.split(','):
+        if item.strip():
+            name, _, size = item.partition(':')
+            try:
+                sizes[name.strip()] = int(size) if size.strip() else 1
+            except ValueError:
+                env.log_to_file('KERNEL', f'Ignoring invalid warm pool size {item.strip()!r}')
+    return sizes
+
+
+# capabilities of MATLAB/Octave installations are probed once and cached across sessions.
+# CAPABILITY_PROBE_VERSION should be bumped whenever sos_capabilities.m probes new features.
+CAPABILITY_CACHE = os.path.join(os.path.expanduser('~'), '.sos', 'matlab_capabilities.json')
+CAPABILITY_PROBE_VERSION = 1
+
+
+class sos_MATLAB(MatlabCodec):
     supported_kernels = {'MATLAB': ['imatlab', 'matlab'], 'Octave': ['octave']}
     background_color = {'MATLAB': '#8ee7f1', 'Octave': '#dff8fb'}
-    options = {}
+    options = {
+        # numeric arrays larger than this size (in bytes) are put to SoS as MatlabArray
+        # handles that transfer only indexed blocks, disabled by default
+        'remote_array_size': None,
+        # send only blocks of numeric arrays that have changed since they were last
+        # sent to the same MATLAB variable, if the variable has not been changed in
+        # MATLAB since then
+        'delta_transfer': False,
+        'delta_block_size': 65536,
+        # snapshot saved by sos_checkpoint(filename, ...) in MATLAB, which is loaded
+        # when the kernel is started or restarted
+        'checkpoint': None,
+        # number of items consumed at a time from iterators and generators
+        'stream_chunk_size': 65536,
+        # send ranges, constant arrays, arithmetic progressions and multiples of
+        # identity matrices as compact expressions instead of their values
+        'symbolic_encoding': True,
+        # memory layout of arrays returned from MATLAB, which are copied to row-major
+        # ('C') arrays by default, or returned column-major ('F') as loaded without copying
+        'array_order': 'C',
+        # uint8 vectors from MATLAB are returned as bytes instead of np.uint8 arrays
+        'uint8_as_bytes': True,
+        # pd.Series are sent as column vectors of values ('vector'), or with name
+        # and index as a struct ('struct') or a one-column table ('table')
+        'series_format': 'vector',
+        # reuse objects that were put to SoS if neither the MATLAB variable nor the
+        # SoS copy has changed since the last transfer. Disabled by default because
+        # MATLAB variables are hashed on every %put, which for large cell arrays,
+        # structs and tables takes longer than transferring them
+        'reuse_unchanged': False,
+        # number of kernels of each kernel spec (e.g. {'octave': 2}) that are started and
+        # initialized in the background and used when a new kernel is needed. Also set by
+        # environment variable SOS_MATLAB_WARM_POOL (e.g. "octave:2,matlab:1") so that the
+        # pool is filled when SoS loads this module
+        'warm_pool': pool_sizes(os.environ.get('SOS_MATLAB_WARM_POOL', '')),
+        # maximum estimated size (in bytes) of variables transferred in one piece. Larger
+        # numeric arrays are written in chunks to MATLAB, or put to SoS as MatlabArray
+        # handles, and other variables are not transferred. Unlimited by default.
+        'transfer_budget': None,
+        # report the size and peak memory usage (traced by tracemalloc) of each transfer,
+        # and the peak RSS of the SoS kernel since it was started. Memory used by
+        # MATLAB/Octave is not reported
+        'memory_report': False,
+        # arrays and dicts with at most this number of values are sent as exact literals
+        # instead of through files, in both directions
+        'inline_size': 256,
+    }
     cd_command = 'cd {dir}'
+    # a new instance is created for each transfer, so states that should persist
+    # during the SoS session are kept at class level, keyed by kernel name
+    _capabilities = {}
+    _sent_blocks = {}
+    _put_fingerprints = {}
 
     def __init__(self, sos_kernel, kernel_name='matlab'):
         self.sos_kernel = sos_kernel
         self.kernel_name = kernel_name
-        self.init_statements = Matlab_init_statements
-        if self.kernel_name == 'octave':
-            self.init_statements += 'pkg load dataframe\n'
+        # capabilities assumed for this transfer if they cannot be probed
+        self._fallback_capabilities = None
+        self.init_statements = kernel_init_statements(self.kernel_name)
+        self.resize_pool()
+        if warm_pool.handed_out(self.kernel_name):
+            # kernels from warm pool have been initialized
+            self.init_statements = ''
+        checkpoint = self.options.get('checkpoint')
+        if checkpoint:
+            self.init_statements += f"if exist('{checkpoint}', 'file')\n    load('{checkpoint}');\nend\n"
+
+    @classmethod
+    def resize_pool(cls):
+        # start or stop kernels in warm pool according to options['warm_pool']
+        for kernel_name, size in (cls.options.get('warm_pool') or {}).items():
+            if warm_pool.size(kernel_name) != size:
+                warm_pool.resize(kernel_name, size, kernel_init_statements(kernel_name), cls.cd_command)
+
+    def _get_stdout(self, statement):
+        #9 MATLAB can use multiple messages for standard output,
+        # so we need to concatenate these outputs.
+        return ''.join(msg['text'] for _, msg in self.sos_kernel.get_response(statement, ('stream',), name=('stdout',)))
+
+    def capabilities(self):
+        '''
+        Features supported by the MATLAB/Octave kernel, which are probed once for each
+        installation and version and cached in ~/.sos/matlab_capabilities.json.
+        '''
+        if self.kernel_name in self._capabilities:
+            return self._capabilities[self.kernel_name]
+        if self._fallback_capabilities is not None:
+            return self._fallback_capabilities
+        try:
+            installation = self._get_stdout('disp([matlabroot, char(32), version])').strip()
+            key = f'{self.kernel_name}:{installation}:{CAPABILITY_PROBE_VERSION}'
+            cache = {}
+            if os.path.isfile(CAPABILITY_CACHE):
+                with open(CAPABILITY_CACHE) as cf:
+                    cache = json.load(cf)
+            if key not in cache:
+                cache[key] = eval(self._get_stdout('disp(sos_capabilities())'))
+                cache[key]['ver'] = self._get_stdout('ver')
+                os.makedirs(os.path.dirname(CAPABILITY_CACHE), exist_ok=True)
+                with open(CAPABILITY_CACHE, 'w') as cf:
+                    json.dump(cache, cf, indent=1)
+            self._capabilities[self.kernel_name] = cache[key]
+        except Exception as e:
+            env.log_to_file('KERNEL', f'Failed to probe capabilities of {self.kernel_name}: {e}')
+            # assume tables for MATLAB and the dataframe package for Octave during this
+            # transfer, and probe again on the next one
+            self._fallback_capabilities = {'istable': self.kernel_name != 'octave'}
+            return self._fallback_capabilities
+        return self._capabilities[self.kernel_name]
 
     def _Matlab_repr(self, obj):
         #  Converting a Python object to a Matlab expression that will be executed
@@ -47,24 +350,30 @@ class sos_MATLAB:
             return 'true' if obj else 'false'
         if isinstance(obj, (int, float, str, complex)):
             return repr(obj)
+        if isinstance(obj, range) and len(obj) > 0 and self.options.get('symbolic_encoding', True):
+            return f"({obj.start}:{obj.step}:{obj[-1]})'"
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return self._bytes_repr(obj)
         if isinstance(obj, Sequence):
             if len(obj) == 0:
                 return '[]'
 
             # if the data is of homogeneous type, let us use []
 
+            if bundled(obj):
+                return self._bundle_repr(obj)
             if homogeneous_type(obj):
                 return '[' + ';'.join(self._Matlab_repr(x) for x in obj) + ']'
             return '{' + ';'.join(self._Matlab_repr(x) for x in obj) + '}'
         if obj is None:
             return 'NaN'
         if isinstance(obj, dict):
-            dic = tempfile.tempdir
-            sio.savemat(os.path.join(dic, 'dict2mtlb.mat'), {'obj': obj})
-            return 'getfield(load(fullfile(' + '\'' + dic + '\'' + ',' \
-                + '\'dict2mtlb.mat\')), \'obj\')'
+            literal = self._inline_value(obj, [self.options.get('inline_size', 256)])
+            return literal if literal is not None else self._bundle_repr(obj)
 
         if isinstance(obj, set):
+            if bundled(obj):
+                return self._bundle_repr(obj)
             return '{' + ','.join(self._Matlab_repr(x) for x in obj) + '}'
         if isinstance(obj, (
                 np.intc,
@@ -84,25 +393,137 @@ class sos_MATLAB:
             return repr(obj)
 
         if isinstance(obj, np.matrixlib.defmatrix.matrix):
+            literal = self._inline_repr(np.asarray(obj))
+            if literal is not None:
+                return literal
             dic = tempfile.tempdir
             sio.savemat(os.path.join(dic, 'mat2mtlb.mat'), {'obj': obj})
             return 'cell2mat(struct2cell(load(fullfile(' + '\'' + dic + '\'' + ',' \
                 + '\'mat2mtlb.mat\'))))'
         if isinstance(obj, np.ndarray):
+            symbolic = self._symbolic_repr(obj)
+            if symbolic is not None:
+                return symbolic
+            literal = self._inline_repr(obj)
+            if literal is not None:
+                return literal
+            if obj.ndim > 1 and obj.flags.f_contiguous and not obj.flags.c_contiguous:
+                # column-major arrays are written from their memory without transposed copies
+                buffer_repr = self._buffer_repr(obj.T.ravel(), 'ary2mtlb.bin')
+                if buffer_repr is not None:
+                    return f"reshape({buffer_repr}, [{' '.join(str(x) for x in obj.shape)}])"
             dic = tempfile.tempdir
             sio.savemat(os.path.join(dic, 'ary2mtlb.mat'), {'obj': obj})
             return 'sos_load_obj(fullfile(' + '\'' + dic + '\'' + ',' \
                 + '\'ary2mtlb.mat\'))'
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return self._series_repr(obj)
         if isinstance(obj, pd.DataFrame):
-            if self.kernel_name == 'octave':
+            if not self.capabilities().get('istable', False):
                 dic = tempfile.tempdir
                 obj.to_csv(os.path.join(dic, 'df2oct.csv'), index=False, quoting=csv.QUOTE_NONNUMERIC, quotechar="'")
                 return 'dataframe(' + '\'' + dic + '/' + 'df2oct.csv\')'
+            # categorical columns are written as integer codes and restored with categories,
+            # datetime and timedelta columns are saved as int64 ticks to a .mat file
+            categoricals = []
+            temporals = []
+            ticks = {}
+            with_categorical = self.capabilities().get('categorical', False)
+            with_datetime = self.capabilities().get('datetime', False)
+            df = obj.copy(deep=False)
+            for idx, dtype in enumerate(obj.dtypes):
+                if with_categorical and isinstance(dtype, pd.CategoricalDtype):
+                    categoricals.append(f'{idx + 1},{matlab_cellstr(dtype.categories)},'
+                                        f'{"true" if dtype.ordered else "false"}')
+                    df.isetitem(idx, obj.iloc[:, idx].cat.codes)
+                elif with_datetime and (pd.api.types.is_datetime64_any_dtype(dtype) or
+                                        pd.api.types.is_timedelta64_dtype(dtype)):
+                    values = obj.iloc[:, idx].array
+                    tz = getattr(dtype, 'tz', None)
+                    temporals.append(f"{idx + 1},'{'duration' if values.dtype.kind == 'm' else 'datetime'}',"
+                                     f"{TICKS_PER_SECOND[values.unit]},'{'' if tz is None else tz}'")
+                    ticks[f'c{idx + 1}'] = values.asi8.reshape(-1, 1)
+                    # placeholder to keep the position of the column in the csv file
+                    df.isetitem(idx, np.zeros(len(df), dtype=np.int8))
             dic = tempfile.tempdir
-            obj.to_csv(os.path.join(dic, 'df2mtlb.csv'), index=False, quoting=csv.QUOTE_NONNUMERIC, quotechar="'")
+            df.to_csv(os.path.join(dic, 'df2mtlb.csv'), index=False, quoting=csv.QUOTE_NONNUMERIC, quotechar="'")
+            if ticks:
+                sio.savemat(os.path.join(dic, 'df2mtlb.mat'), ticks)
+            if categoricals or temporals:
+                return 'sos_load_table(' + '\'' + dic + '/' + 'df2mtlb.csv\', {' + ';'.join(categoricals) + \
+                    '}, {' + ';'.join(temporals) + '}, \'' + dic + '/' + 'df2mtlb.mat\')'
             return 'readtable(' + '\'' + dic + '/' + 'df2mtlb.csv\')'
+        if isinstance(obj, Iterable):
+            return self._stream_repr(iter(obj))
+
+    def _buffer_repr(self, values, filename):
+        # Write a 1-d numeric array from its buffer (without copying if it is contiguous
+        # and little-endian) to a binary file that is loaded as a typed column vector
+        values = np.ascontiguousarray(values)
+        if values.dtype.kind not in 'biuf' or \
+                values.dtype.kind != 'b' and values.dtype.str[1:] not in MATLAB_PRECISIONS:
+            return None
+        values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+        dic = tempfile.tempdir
+        values.tofile(os.path.join(dic, filename))
+        precision = 'uint8' if values.dtype.kind == 'b' else MATLAB_PRECISIONS[values.dtype.str[1:]]
+        return f"sos_load_stream(fullfile('{dic}', '{filename}'), '{precision}', 1, " \
+            f"{'true' if values.dtype.kind == 'b' else 'false'})"
+
+    def _bytes_repr(self, obj):
+        # objects with buffer protocol are written from their memory as uint8 column
+        # vectors, or as typed arrays according to the format of memoryviews
+        values = np.asarray(obj) if isinstance(obj, memoryview) else np.frombuffer(obj, dtype=np.uint8)
+        if values.ndim > 1:
+            return self._Matlab_repr(values)
+        return self._buffer_repr(values, 'buf2mtlb.bin') or self._Matlab_repr(values.reshape(-1, 1))
+
+    def _list_repr(self, obj):
+        # strings of a Series or Index as a cell array, and other values as a list
+        if pd.api.types.infer_dtype(obj, skipna=False) == 'string':
+            return matlab_cellstr(obj)
+        return self._Matlab_repr(obj.tolist())
+
+    def _series_repr(self, obj):
+        # values of a Series or Index as a typed column vector, or with name and index of
+        # a Series as a struct or a one-column table, depending on option series_format
+        if isinstance(obj.dtype, np.dtype) or not pd.api.types.is_numeric_dtype(obj.dtype):
+            values = obj.to_numpy()
+        else:
+            # nullable integer, float and boolean arrays with missing values as NaN
+            values = obj.to_numpy(dtype=np.float64, na_value=np.nan)
+        values_repr = self._column_repr(obj, values, 'ser2mtlb')
+        fmt = self.options.get('series_format', 'vector')
+        if isinstance(obj, pd.Index) or fmt == 'vector':
+            return values_repr
+        name = matlab_str('values' if obj.name is None else obj.name)
+        if fmt == 'table' and self.capabilities().get('istable', False):
+            if isinstance(obj.index, pd.RangeIndex) or not obj.index.is_unique:
+                return f'table({values_repr}, \'VariableNames\', {{{name}}})'
+            return f'table({values_repr}, \'VariableNames\', {{{name}}}, ' \
+                f'\'RowNames\', {matlab_cellstr(obj.index)})'
+        index_repr = self._column_repr(obj.index, obj.index.to_numpy(), 'idx2mtlb')
+        return f"struct('name', {name}, 'index', {{{index_repr}}}, 'values', {{{values_repr}}})"
+
+    def _column_repr(self, obj, values, basename):
+        # values of a Series or Index as a column vector. Categorical values are saved as
+        # codes plus categories, and datetime and timedelta values as int64 ticks, which
+        # are loaded as categorical, datetime and duration arrays as columns of DataFrames,
+        # or sent as strings if MATLAB/Octave does not support these types.
+        if isinstance(obj.dtype, pd.CategoricalDtype):
+            if self.capabilities().get('categorical', False):
+                return self._bundle_repr(obj, basename + '.mat')
+            return matlab_cellstr(str(x) for x in obj)
+        if pd.api.types.is_datetime64_any_dtype(obj.dtype) or pd.api.types.is_timedelta64_dtype(obj.dtype):
+            if self.capabilities().get('datetime', False):
+                return self._bundle_repr(obj, basename + '.mat')
+            self.sos_kernel.warn(
+                f'{obj.dtype} values are not supported by kernel {self.kernel_name} and are passed as strings')
+            return matlab_cellstr(str(x) for x in obj)
+        return self._buffer_repr(values, basename + '.bin') or self._list_repr(obj)
 
     async def get_vars(self, names, as_var=None):
+        budget = self.options.get('transfer_budget')
         for name in names:
             # add 'm' to any variable beginning with '_'
             if as_var is not None:
@@ -112,39 +533,204 @@ class sos_MATLAB:
                 newname = 'm' + name
             else:
                 newname = name
-            matlab_repr = self._Matlab_repr(env.sos_dict[name])
-            env.log_to_file('KERNEL', f'Executing \n{matlab_repr}')
+            obj = env.sos_dict[name]
+            memory_report = self.options.get('memory_report', False)
+            size = object_size(obj) if budget is not None or memory_report else None
+            with traced_memory() if memory_report else nullcontext({}) as stats:
+                statement = self._delta_statement(newname, obj)
+                if statement is None and budget is not None and size > budget:
+                    statement = self._chunked_statement(newname, obj, budget)
+                    if statement is None:
+                        self.sos_kernel.warn(
+                            f'Variable {name} of type {obj.__class__.__name__} is not passed to kernel '
+                            f'{self.kernel_name} because its estimated size {pretty_size(size)} exceeds '
+                            f'transfer budget {pretty_size(budget)}')
+                        continue
+                if statement is None:
+                    statement = f'{newname} = {self._Matlab_repr(obj)}'
+            if statement == '':
+                # nothing has changed
+                continue
+            self._report_memory(name, size, stats)
+            env.log_to_file('KERNEL', f'Executing \n{statement}')
             await self.sos_kernel.run_cell(
-                f'{newname} = {matlab_repr}',
+                statement,
                 True,
                 False,
-                on_error=f'Failed to get variable {name} of type {env.sos_dict[name].__class__.__name__} to Matlab')
+                on_error=f'Failed to get variable {name} of type {obj.__class__.__name__} to Matlab')
+
+    def _chunked_statement(self, name, obj, budget):
+        # Statement that assigns numeric array obj to name, which is written to a binary
+        # file in column-major order in chunks of at most budget bytes so that at most
+        # one chunk is copied at a time. Returns None if obj is not a numeric array.
+        if not isinstance(obj, np.ndarray) or obj.dtype.kind not in 'biuf' or obj.size == 0:
+            return None
+        obj = np.asarray(obj)
+        dtype = obj.dtype.newbyteorder('<')
+        if dtype.kind == 'f' and dtype.str[1:] not in MATLAB_PRECISIONS:
+            # float16 values are sent as doubles, as by savemat
+            dtype = np.dtype('<f8')
+        # 1-d arrays are sent as row vectors
+        shape = obj.shape if obj.ndim > 1 else (1, obj.size)
+        # number of values that fit in budget, before and after conversion to dtype
+        step = max(1, budget // max(obj.dtype.itemsize, dtype.itemsize))
+        # row-major order of the transpose is column-major order of the array, and
+        # slices of its flat iterator copy only the values in the slice
+        values = obj.T.flat
+        dic = tempfile.tempdir
+        with open(os.path.join(dic, 'chunk2mtlb.bin'), 'wb') as out:
+            for start in range(0, obj.size, step):
+                values[start:start + step].astype(dtype, copy=False).tofile(out)
+        precision = 'uint8' if dtype.kind == 'b' else MATLAB_PRECISIONS[dtype.str[1:]]
+        return f"{name} = reshape(sos_load_stream(fullfile('{dic}', 'chunk2mtlb.bin'), '{precision}', 1, " \
+            f"{'true' if dtype.kind == 'b' else 'false'}), [{' '.join(str(x) for x in shape)}])"
+
+    def _report_memory(self, name, size, stats):
+        # report estimated size and peak memory usage of the transfer of variable name
+        if not self.options.get('memory_report', False):
+            return
+        rss = peak_rss()
+        msg = f'{name}: estimated size {pretty_size(size) if size is not None else "unknown"}, ' \
+            f'peak Python memory {pretty_size(stats.get("peak", 0))} during transfer' + \
+            (f', peak RSS of SoS kernel since start {pretty_size(rss)}' if rss is not None else '') + '\n'
+        env.log_to_file('KERNEL', msg)
+        self.sos_kernel.send_response(self.sos_kernel.iopub_socket, 'stream', {'name': 'stdout', 'text': msg})
+
+    def _delta_statement(self, name, obj):
+        # Statement that updates MATLAB variable name with blocks of array obj that have
+        # changed since obj was last sent, '' if nothing has changed, or None if obj
+        # should be sent in full. Hashes of the blocks sent are recorded in both cases.
+        key = (self.kernel_name, name)
+        if not self.options.get('delta_transfer', False) or not isinstance(obj, np.ndarray) \
+                or isinstance(obj, np.matrix) or obj.ndim == 0 or obj.dtype.kind not in 'biuf' \
+                or obj.dtype.kind != 'b' and obj.dtype.str[1:] not in MATLAB_PRECISIONS:
+            self._sent_blocks.pop(key, None)
+            return None
+        block_size = self.options.get('delta_block_size', 65536)
+        order, hashes = block_hashes(obj, block_size)
+        # 1-d arrays are saved as row vectors by savemat
+        shape = obj.shape if obj.ndim > 1 else (1, obj.size)
+        last = self._sent_blocks.get(key)
+        # fingerprint of the variable in MATLAB after obj is sent
+        self._sent_blocks[key] = (shape, obj.dtype, order, block_size, hashes, matlab_fingerprint(obj))
+        if last is None or last[:4] != (shape, obj.dtype, order, block_size):
+            return None
+        changed = [i for i, (x, y) in enumerate(zip(hashes, last[4])) if x != y]
+        if len(changed) * 2 > len(hashes):
+            return None
+        # make sure that the variable in MATLAB has not been changed since it was last sent
+        if self._get_stdout(f'disp(sos_fingerprint({name}))').strip() != last[5]:
+            return None
+        if not changed:
+            return ''
+        index = np.concatenate([np.arange(i * block_size, min((i + 1) * block_size, obj.size)) for i in changed])
+        values = obj.ravel(order=order)[index]
+        if order == 'C' and obj.ndim > 1:
+            # MATLAB uses column-major linear indexes
+            index = np.ravel_multi_index(np.unravel_index(index, obj.shape), obj.shape, order='F')
+        dic = tempfile.tempdir
+        sio.savemat(os.path.join(dic, 'delta2mtlb.mat'), {'index': index + 1.0, 'values': values})
+        return f"sos_delta = load(fullfile('{dic}', 'delta2mtlb.mat')); " \
+            f"{name}(sos_delta.index) = sos_delta.values; clear sos_delta"
 
     def put_vars(self, items, to_kernel=None, as_var=None):
         if not items:
             return {}
 
         result = {}
+        remote_array_size = self.options.get('remote_array_size')
+        budget = self.options.get('transfer_budget')
+        memory_report = self.options.get('memory_report', False)
         for item in items:
-            py_repr = f'display(sos_py_repr({item}))'
-            #9 MATLAB can use multiple messages for standard output,
-            # so we need to concatenate these outputs.
-            expr = ''
-            for _, msg in self.sos_kernel.get_response(py_repr, ('stream',), name=('stdout',)):
-                expr += msg['text']
-
-            cwd = os.getcwd()
-            try:
-                if 'loadmat' in expr:
-                    # imported to be used by eval
-                    from scipy.io import loadmat
-                # evaluate as raw string to correctly handle \\ etc
-                result[as_var if as_var else item] = eval(expr)
-            except Exception as e:
-                self.sos_kernel.warn(f'Failed to evaluate {expr!r}: {e}')
-            finally:
-                os.chdir(cwd)
+            name = as_var if as_var else item
+            if remote_array_size is not None and to_kernel in (None, 'SoS'):
+                handle = self._remote_array(item, remote_array_size)
+                if handle is not None:
+                    result[name] = handle
+                    continue
+            size = self._matlab_size(item) if budget is not None or memory_report else None
+            if budget is not None and size is not None and size > budget:
+                # numeric arrays are put as handles that transfer indexed blocks
+                handle = self._remote_array(item, 0) if to_kernel in (None, 'SoS') else None
+                if handle is not None:
+                    result[name] = handle
+                else:
+                    self.sos_kernel.warn(
+                        f'Variable {item} is not passed from kernel {self.kernel_name} because its size '
+                        f'{pretty_size(size)} exceeds transfer budget {pretty_size(budget)}')
+                continue
+            with traced_memory() if memory_report else nullcontext({}) as stats:
+                self._put_var(item, name, result)
+            self._report_memory(item, size, stats)
         return result
 
+    def _put_var(self, item, name, result):
+        # evaluates the repr of MATLAB variable item as result[name], or reuses the
+        # existing SoS variable if neither has changed since the last transfer
+
+        # values of arrays with at most inline_size values are returned as literals
+        repr_statement = f"display(sos_py_repr({item}, {self.options.get('inline_size', 256)}))"
+        if not self.options.get('reuse_unchanged', False):
+            expr = self._get_stdout(repr_statement)
+            fingerprint = None
+        else:
+            # only the id and digest of the SoS copy are kept so that it is released
+            # when it is removed from SoS
+            key = (self.kernel_name, item)
+            last = self._put_fingerprints.pop(key, None)
+            if last is not None and name in env.sos_dict and id(env.sos_dict[name]) == last[1] \
+                    and object_digest(env.sos_dict[name]) == last[2] \
+                    and self._get_stdout(f'disp(sos_fingerprint({item}))').strip() == last[0]:
+                self._put_fingerprints[key] = last
+                result[name] = env.sos_dict[name]
+                return
+            # the fingerprint is printed in the first line, followed by the repr
+            fingerprint, _, expr = self._get_stdout(
+                f'disp(sos_fingerprint({item})); {repr_statement}').partition('\n')
+
+        cwd = os.getcwd()
+        try:
+            if 'loadmat' in expr:
+                # imported to be used by eval
+                from scipy.io import loadmat
+            # evaluate as raw string to correctly handle \\ etc
+            result[name] = eval(expr)
+            if fingerprint is not None:
+                digest = object_digest(result[name])
+                if digest is not None:
+                    self._put_fingerprints[key] = (fingerprint.strip(), id(result[name]), digest)
+        except Exception as e:
+            self.sos_kernel.warn(f'Failed to evaluate {expr!r}: {e}')
+        finally:
+            os.chdir(cwd)
+
+    def _matlab_size(self, item):
+        # size of MATLAB variable item in bytes as reported by whos, or None if unknown
+        try:
+            return int(self._get_stdout(f"disp(getfield(whos('{item}'), 'bytes'))").strip())
+        except ValueError:
+            return None
+
+    def _remote_array(self, item, min_size):
+        # returns a handle to MATLAB array item if it is larger than min_size
+        try:
+            info = eval(self._get_stdout(f'disp(sos_array_info({item}))'))
+        except Exception as e:
+            env.log_to_file('KERNEL', f'Failed to get array information of {item}: {e}')
+            return None
+        if info is None:
+            return None
+        mclass, is_complex, shape = info
+        dtype = np.dtype(MATLAB_DTYPES[mclass])
+        if is_complex:
+            dtype = np.result_type(dtype, np.complex64)
+        if int(np.prod(shape)) * dtype.itemsize <= min_size:
+            return None
+        return MatlabArray(self.sos_kernel.KC, item, shape, dtype)
+
     def sessioninfo(self):
-        return self.sos_kernel.get_response(r'ver', ('stream',), name=('stdout',))[0][1]['text']
+        info = self.capabilities().get('ver')
+        return info if info is not None else self._get_stdout('ver')
+
+
+sos_MATLAB.resize_pool()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) Bo Peng and the University of Texas MD Anderson Cancer Center
+# Distributed under the terms of the 3-clause BSD License.
+
+import atexit
+import threading
+
+from jupyter_client import manager
+from sos.utils import env
+
+
+class KernelPool:
+    '''
+    Pool of subkernels that are started and initialized in the background. Once
+    installed, the pool replaces jupyter_client.manager.start_new_kernel, which
+    SoS uses to start subkernels, so that a kernel of a pooled kernel spec is
+    taken from the pool if one is ready, and the pool is refilled in the background.
+    Kernels of other kernel specs, or that are requested when the pool is empty,
+    are started as usual.
+    '''
+
+    def __init__(self):
+        self._start_new_kernel = None
+        self._lock = threading.Lock()
+        # kernel spec name to number of kernels to keep ready, statements to initialize
+        # the kernels, and command to change their working directory
+        self._sizes = {}
+        self._init_statements = {}
+        self._cd_commands = {}
+        # keyword arguments such as stdout and stderr passed to start_new_kernel when
+        # kernels are started for the pool
+        self._start_kwargs = {}
+        self._kernels = {}
+        self._starting = {}
+        # kernel spec names of kernels that have been handed out and not yet claimed
+        # with handed_out()
+        self._handed_out = set()
+
+    def install(self):
+        if self._start_new_kernel is None:
+            self._start_new_kernel = manager.start_new_kernel
+            manager.start_new_kernel = self.start_new_kernel
+            atexit.register(self.shutdown)
+
+    def resize(self, kernel_name, size, init_statements='', cd_command='cd {dir}', **kwargs):
+        # keep size kernels of kernel spec kernel_name ready, which are started with kwargs
+        # and initialized with init_statements. Extra kernels are shut down if size is reduced.
+        self.install()
+        with self._lock:
+            self._sizes[kernel_name] = size
+            self._init_statements[kernel_name] = init_statements
+            self._cd_commands[kernel_name] = cd_command
+            self._start_kwargs[kernel_name] = kwargs
+            kernels = self._kernels.setdefault(kernel_name, [])
+            extra = kernels[size:]
+            del kernels[size:]
+        for km, kc in extra:
+            kc.stop_channels()
+            km.shutdown_kernel(now=True)
+        self._fill(kernel_name)
+
+    def size(self, kernel_name):
+        return self._sizes.get(kernel_name, 0)
+
+    def ready(self, kernel_name):
+        # number of kernels that are ready to be handed out
+        return len(self._kernels.get(kernel_name, []))
+
+    def handed_out(self, kernel_name):
+        # if a kernel of kernel_name has been handed out since the last call, which
+        # is therefore already initialized
+        with self._lock:
+            if kernel_name in self._handed_out:
+                self._handed_out.discard(kernel_name)
+                return True
+            return False
+
+    def start_new_kernel(self, startup_timeout=60, kernel_name='python', **kwargs):
+        with self._lock:
+            kernels = self._kernels.get(kernel_name)
+            # kernels whose startup output is captured with stdout or stderr are not
+            # taken from the pool, which has been started without them
+            if 'stdout' in kwargs or 'stderr' in kwargs:
+                kernels = None
+            kernel = kernels.pop(0) if kernels else None
+            if kernel is not None:
+                self._handed_out.add(kernel_name)
+        if kernel is None:
+            return self._start_new_kernel(startup_timeout=startup_timeout, kernel_name=kernel_name, **kwargs)
+        env.log_to_file('KERNEL', f'Using kernel {kernel_name} from warm pool')
+        if kwargs.get('cwd'):
+            kernel[1].execute_interactive(
+                self._cd_commands[kernel_name].format(dir=kwargs['cwd']),
+                silent=True, store_history=False, output_hook=lambda msg: None)
+        self._fill(kernel_name)
+        return kernel
+
+    def _fill(self, kernel_name):
+        # start kernels in the background until the pool is full
+        with self._lock:
+            missing = self._sizes.get(kernel_name, 0) - len(self._kernels.get(kernel_name, [])) \
+                - self._starting.get(kernel_name, 0)
+            if missing > 0:
+                self._starting[kernel_name] = self._starting.get(kernel_name, 0) + missing
+        for _ in range(missing):
+            threading.Thread(target=self._start, args=(kernel_name,), daemon=True).start()
+
+    def _start(self, kernel_name):
+        try:
+            env.log_to_file('KERNEL', f'Starting kernel {kernel_name} for warm pool')
+            km, kc = self._start_new_kernel(
+                startup_timeout=60, kernel_name=kernel_name, **self._start_kwargs.get(kernel_name, {}))
+            if self._init_statements.get(kernel_name):
+                kc.execute_interactive(
+                    self._init_statements[kernel_name],
+                    silent=True, store_history=False, output_hook=lambda msg: None)
+        except Exception as e:
+            env.log_to_file('KERNEL', f'Failed to start kernel {kernel_name} for warm pool: {e}')
+            with self._lock:
+                self._starting[kernel_name] -= 1
+            return
+        with self._lock:
+            self._starting[kernel_name] -= 1
+            kernels = self._kernels.setdefault(kernel_name, [])
+            if len(kernels) < self._sizes.get(kernel_name, 0):
+                kernels.append((km, kc))
+                km = None
+        if km is not None:
+            # the pool has been reduced while the kernel was starting
+            km.shutdown_kernel(now=True)
+
+    def shutdown(self):
+        # shut down kernels that have not been handed out
+        with self._lock:
+            self._sizes.clear()
+            kernels = [x for y in self._kernels.values() for x in y]
+            self._kernels.clear()
+        for km, kc in kernels:
+            try:
+                kc.stop_channels()
+                km.shutdown_kernel(now=True)
+            except Exception as e:
+                env.log_to_file('KERNEL', f'Failed to shut down pooled kernel: {e}')
+
+
+warm_pool = KernelPool()
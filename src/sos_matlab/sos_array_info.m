@@ -0,0 +1,8 @@
+function [repr] = sos_array_info (obj)
+% Return class, complexity and size of a numeric or logical array as a
+% Python tuple literal, or None if obj is not a numeric or logical array.
+if isnumeric(obj) || islogical(obj)
+    repr = ['("', class(obj), '",', sos_py_repr(~isreal(obj)), ',(', sprintf('%d,', size(obj)), '))'];
+else
+    repr = 'None';
+end
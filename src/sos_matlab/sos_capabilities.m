@@ -0,0 +1,42 @@
+function [repr] = sos_capabilities ()
+% Probe features of the running MATLAB or Octave that determine how data
+% can be transferred, and return them as a Python dict literal.
+repr = ['{"v73":', py_bool(supports_v73()), ...
+    ',"memmapfile":', py_bool(exist('memmapfile') > 0), ...
+    ',"struct2table":', py_bool(exist('struct2table') > 0), ...
+    ',"string":', py_bool(supports('isstring(string(''a''))')), ...
+    ',"istable":', py_bool(exist('istable') > 0 && exist('readtable') > 0), ...
+    ',"categorical":', py_bool(supports('iscategorical(categorical({''a''}))')), ...
+    ',"datetime":', py_bool(supports('isdatetime(datetime(2000, 1, 1))')), ...
+    '}'];
+end
+
+function [res] = supports (expr)
+    try
+        res = logical(eval(expr));
+    catch
+        res = false;
+    end
+end
+
+function [res] = supports_v73 ()
+    res = false;
+    obj = 1;
+    filename = [tempname() '.mat'];
+    try
+        save(filename, 'obj', '-v7.3');
+        res = true;
+    catch
+    end
+    if exist(filename, 'file')
+        delete(filename);
+    end
+end
+
+function [repr] = py_bool (val)
+    if val
+        repr = 'True';
+    else
+        repr = 'False';
+    end
+end
@@ -0,0 +1,38 @@
+function [saved] = sos_checkpoint (filename, varargin)
+% Save variables of the caller workspace (all variables if unspecified) to
+% snapshot filename, which can be restored with a single load(filename),
+% for example after the kernel is restarted. Only variables that have changed
+% since the last checkpoint to the same file are written, according to their
+% fingerprints saved next to the snapshot. Names of saved variables are returned.
+if isempty(varargin)
+    names = evalin('caller', 'who');
+else
+    names = varargin;
+end
+[dirname, basename] = fileparts(filename);
+fpfile = fullfile(dirname, [basename, '.fingerprints.mat']);
+fps = struct();
+if exist(filename, 'file') && exist(fpfile, 'file')
+    fps = load(fpfile);
+end
+append = ~isempty(fieldnames(fps));
+changed = struct();
+saved = {};
+for i = 1:numel(names)
+    value = evalin('caller', names{i});
+    fp = sos_fingerprint(value);
+    if ~isfield(fps, names{i}) || ~strcmp(fps.(names{i}), fp)
+        changed.(names{i}) = value;
+        fps.(names{i}) = fp;
+        saved{end + 1} = names{i};
+    end
+end
+if isempty(saved)
+    return
+end
+if append
+    save(filename, '-v6', '-struct', 'changed', '-append');
+else
+    save(filename, '-v6', '-struct', 'changed');
+end
+save(fpfile, '-v6', '-struct', 'fps');
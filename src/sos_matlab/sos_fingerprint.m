@@ -0,0 +1,65 @@
+function [fp] = sos_fingerprint (obj)
+% Return a signature of the class, size and content of obj, which is used
+% to tell if a variable has changed. A unique signature is returned if the
+% content of obj cannot be hashed so that it is always treated as changed.
+% Arrays are hashed in chunks and containers by their elements so that
+% large variables are not copied as a whole. Containers are hashed with one
+% md5 per element, which is slow for large cell arrays, structs and tables.
+fp = [class(obj), sprintf('_%d', size(obj)), '_'];
+try
+    if (isnumeric(obj) && isreal(obj)) || islogical(obj)
+        % md5 of md5s of chunks of raw values in column-major order, which
+        % is also computed by SoS for arrays that it sends (matlab_fingerprint)
+        hashes = '';
+        n = 1048576;
+        for i = 1:n:numel(obj)
+            chunk = obj(i:min(i + n - 1, numel(obj)));
+            if islogical(chunk)
+                chunk = uint8(chunk);
+            end
+            hashes = [hashes, md5(typecast(chunk(:)', 'uint8'))];
+        end
+        fp = [fp, md5(uint8(hashes))];
+    elseif isnumeric(obj)
+        fp = [fp, md5(uint8([sos_fingerprint(real(obj)), sos_fingerprint(imag(obj))]))];
+    elseif ischar(obj)
+        fp = [fp, md5(typecast(uint16(obj(:)'), 'uint8'))];
+    elseif isstruct(obj)
+        names = fieldnames(obj);
+        parts = cell(numel(names), numel(obj));
+        for i = 1:numel(obj)
+            for j = 1:numel(names)
+                parts{j, i} = sos_fingerprint(obj(i).(names{j}));
+            end
+        end
+        fp = [fp, md5(uint8([strjoin(names', ','), parts{:}]))];
+    elseif iscell(obj)
+        parts = cell(1, numel(obj));
+        for i = 1:numel(obj)
+            parts{i} = sos_fingerprint(obj{i});
+        end
+        fp = [fp, md5(uint8([parts{:}]))];
+    elseif exist('istable') && istable(obj)
+        names = obj.Properties.VariableNames;
+        parts = cell(1, numel(names));
+        for j = 1:numel(names)
+            parts{j} = sos_fingerprint(obj.(names{j}));
+        end
+        fp = [fp, md5(uint8([strjoin(names, ','), parts{:}]))];
+    elseif exist('OCTAVE_VERSION', 'builtin')
+        fp = [fp, md5(uint8(disp(obj)))];
+    else
+        fp = [fp, md5(getByteStreamFromArray(obj))];
+    end
+catch
+    [~, fp] = fileparts(tempname());
+end
+
+function [hex] = md5 (bytes)
+if exist('OCTAVE_VERSION', 'builtin')
+    hex = hash('md5', char(bytes));
+else
+    md = java.security.MessageDigest.getInstance('MD5');
+    md.update(bytes);
+    hex = sprintf('%02x', typecast(md.digest(), 'uint8'));
+end
@@ -0,0 +1,42 @@
+function [obj] = sos_load_bundle (filename)
+% Load variable obj saved by SoS to filename, with all values of a nested
+% container. Structs with a sos_type field are converted to tables,
+% categorical, datetime, duration and logical arrays.
+data = load(filename);
+obj = decode(data.obj);
+
+function [obj] = decode (obj)
+if iscell(obj)
+    for i = 1:numel(obj)
+        obj{i} = decode(obj{i});
+    end
+elseif isstruct(obj) && isscalar(obj) && isfield(obj, 'sos_type')
+    switch obj.sos_type
+        case 'logical'
+            obj = logical(obj.values);
+        case 'table'
+            columns = decode(obj.columns);
+            obj = table(columns{:}, 'VariableNames', obj.names');
+        case 'categorical'
+            cats = obj.categories;
+            obj = categorical(double(obj.codes), 0:numel(cats) - 1, cats, 'Ordinal', logical(obj.ordinal));
+        case 'duration'
+            missing = obj.ticks == intmin('int64');
+            col = milliseconds(double(obj.ticks) * (1000 / obj.ticks_per_second));
+            col(missing) = NaN;
+            obj = col;
+        case 'datetime'
+            missing = obj.ticks == intmin('int64');
+            col = datetime(obj.ticks, 'ConvertFrom', 'epochtime', 'Epoch', '1970-01-01', ...
+                'TicksPerSecond', obj.ticks_per_second, 'TimeZone', obj.time_zone);
+            col(missing) = NaT;
+            obj = col;
+    end
+elseif isstruct(obj)
+    names = fieldnames(obj);
+    for i = 1:numel(obj)
+        for j = 1:numel(names)
+            obj(i).(names{j}) = decode(obj(i).(names{j}));
+        end
+    end
+end
@@ -0,0 +1,9 @@
+function [obj] = sos_load_stream (filename, precision, ncols, islogical)
+% Read an array streamed by SoS from a Python iterable, which is saved as
+% raw little-endian values of type precision, with ncols values per item.
+fid = fopen(filename, 'r', 'l');
+obj = fread(fid, [ncols, Inf], ['*', precision])';
+fclose(fid);
+if islogical
+    obj = logical(obj);
+end
@@ -0,0 +1,32 @@
+function [tbl] = sos_load_table (filename, categoricals, temporals, matfile)
+% Read a table from a csv file written by SoS. Each row of categoricals
+% lists the index, categories and ordinal flag of a column that is stored
+% as 0-based integer codes, which is converted to a categorical array.
+% Each row of temporals lists the index, type (datetime or duration), ticks
+% per second and time zone of a column that is saved as int64 ticks since
+% epoch in variable c<index> of matfile.
+tbl = readtable(filename);
+for i = 1:size(categoricals, 1)
+    name = tbl.Properties.VariableNames{categoricals{i, 1}};
+    cats = categoricals{i, 2};
+    tbl.(name) = categorical(tbl.(name), 0:numel(cats) - 1, cats, 'Ordinal', categoricals{i, 3});
+end
+if nargin < 3
+    temporals = {};
+elseif ~isempty(temporals)
+    data = load(matfile);
+end
+for i = 1:size(temporals, 1)
+    name = tbl.Properties.VariableNames{temporals{i, 1}};
+    ticks = data.(sprintf('c%d', temporals{i, 1}));
+    missing = ticks == intmin('int64');
+    if strcmp(temporals{i, 2}, 'duration')
+        col = milliseconds(double(ticks) * (1000 / temporals{i, 3}));
+        col(missing) = NaN;
+    else
+        col = datetime(ticks, 'ConvertFrom', 'epochtime', 'Epoch', '1970-01-01', ...
+            'TicksPerSecond', temporals{i, 3}, 'TimeZone', temporals{i, 4});
+        col(missing) = NaT;
+    end
+    tbl.(name) = col;
+end
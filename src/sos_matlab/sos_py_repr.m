@@ -1,4 +1,4 @@
-function [repr] = sos_py_repr (obj)
+function [repr] = sos_py_repr (obj, inline_size)
 % isnumeric(A) returns true if A is a numeric array and false otherwise.
 % single Single-precision floating-point array
 % double Double-precision floating-point array
@@ -10,9 +10,37 @@ function [repr] = sos_py_repr (obj)
 % uint32 32-bit unsigned integer array
 % int64 64-bit signed integer array
 % uint64 64-bit unsigned integer array
+%
+% Real matrices and N-D arrays with at most inline_size (default 256) finite
+% values are returned as literals instead of being saved to .mat files.
+if nargin < 2
+    inline_size = 256;
+end
 if isnumeric(obj)
+    % constant arrays, arithmetic progressions and multiples of identity
+    % matrices are returned as compact expressions
+    repr = '';
+    if ~isscalar(obj) && ~isa(obj, 'uint8')
+        repr = sos_symbolic_repr(obj);
+    end
+    if ~isempty(repr)
+        % already converted
+    % uint8 arrays are returned as bytes or np.uint8 arrays, from literals of at most
+    % inline_size values, or from raw bytes written to a file for each array because
+    % arrays in structs and cells are only read after sos_py_repr has returned
+    elseif isa(obj, 'uint8') && ~isscalar(obj)
+        if numel(obj) <= inline_size
+            source = ['bytes([', sprintf('%d,', obj), '])'];
+        else
+            filename = [tempname() '.bin'];
+            fid = fopen(filename, 'w');
+            fwrite(fid, obj, 'uint8');
+            fclose(fid);
+            source = ['r''', filename, ''''];
+        end
+        repr = ['uint8_array(', source, ',(', sprintf('%d,', size(obj)), '))'];
     % isscalar(A) returns logical 1 (true) if size(A) returns [1 1], and logical 0 (false) otherwise.
-    if isscalar(obj)
+    elseif isscalar(obj)
         if isinf(obj)
             if obj > 0
                 repr = 'np.inf';
@@ -41,14 +69,28 @@ if isnumeric(obj)
         else
             repr = strcat('np.array([', strjoin(arrayfun(@(x) sos_py_repr(x), obj, 'UniformOutput', false),','), '])');
         end
+    % small real arrays are returned as literals of values in column-major order
+    elseif numel(obj) <= inline_size && isreal(obj) && all(isfinite(obj(:)))
+        if isinteger(obj)
+            values = sprintf('%d,', obj);
+            dtype = class(obj);
+        else
+            values = sprintf('%.17g,', obj);
+            dtype = 'float64';
+            if isa(obj, 'single')
+                dtype = 'float32';
+            end
+        end
+        repr = ['inline_array([', values, '],(', sprintf('%d,', size(obj)), '),''', dtype, ''',', ...
+            sos_py_repr(ismatrix(obj)), ')'];
     % ismatrix(V) returns logical 1 (true) if size(V) returns [m n] with nonnegative integer values m and n, and logical 0 (false) otherwise.
     elseif ismatrix(obj)
         save('-v6', fullfile(tempdir, 'mat2py.mat'), 'obj');
-        repr = strcat('np.matrix(sio.loadmat(r''', tempdir, 'mat2py.mat'')', '[''', 'obj', '''])');
+        repr = strcat('loadmat_array(r''', tempdir, 'mat2py.mat'', True)');
     elseif length(size(obj)) >= 3
         % 3d or even higher matrix
         save('-v6', fullfile(tempdir, 'mat2py.mat'), 'obj');
-        repr = strcat('sio.loadmat(r''', tempdir, 'mat2py.mat'')', '[''', 'obj', ''']');
+        repr = strcat('loadmat_array(r''', tempdir, 'mat2py.mat'', False)');
     % other, maybe canbe improved with the vector's block
     else
         % not sure what this could be
@@ -69,7 +111,7 @@ elseif isstruct(obj)
     fields = fieldnames(obj);
     repr = '{';
     for i = 1:numel(fields)
-        repr = strcat(repr, '"', fields{i}, '":', sos_py_repr(obj.(fields{i})), ',');
+        repr = strcat(repr, '"', fields{i}, '":', sos_py_repr(obj.(fields{i}), inline_size), ',');
     end
     repr = strcat(repr, '}');
 
@@ -80,7 +122,7 @@ elseif iscell(obj)
     if size(obj,1)==1
         repr = '[';
         for i = 1:size(obj,2)
-            repr = strcat(repr, sos_py_repr(obj{1,i}), ',');
+            repr = strcat(repr, sos_py_repr(obj{1,i}, inline_size), ',');
         end
         repr = strcat(repr,']');
     else
@@ -106,9 +148,43 @@ elseif islogical(obj)
 % table, table usually is also real, and can be a vector and matrix
 % sometimes, so it needs to be put in front of them.
 elseif istable(obj)
+    % categorical columns are written as 0-based codes, and their categories
+    % are passed separately to restore pd.Categorical columns. datetime and
+    % duration columns are saved as int64 nanoseconds to a .mat file.
+    cats = '';
+    temporals = '';
+    ticks = struct();
+    for i = 1:size(obj, 2)
+        name = obj.Properties.VariableNames{i};
+        col = obj.(name);
+        if iscategorical(col)
+            cats = [cats, 'r"""', name, '""":(', sos_py_repr(categories(col)'), ',', ...
+                sos_py_repr(isordinal(col)), '),'];
+            obj.(name) = double(col) - 1;
+        elseif isdatetime(col) || isduration(col)
+            if isdatetime(col)
+                val = convertTo(col, 'epochtime', 'Epoch', '1970-01-01', 'TicksPerSecond', 1000000000);
+                temporals = [temporals, 'r"""', name, '""":(', num2str(i), ',"datetime",r"""', col.TimeZone, '"""),'];
+            else
+                val = int64(milliseconds(col) * 1000000);
+                temporals = [temporals, 'r"""', name, '""":(', num2str(i), ',"duration",""),'];
+            end
+            val(ismissing(col)) = intmin('int64');
+            ticks.(sprintf('c%d', i)) = val;
+            % placeholder to keep the position of the column in the csv file
+            obj.(name) = zeros(size(col, 1), 1);
+        end
+    end
     cd (tempdir);
     writetable(obj,'tab2py.csv','Delimiter',',','QuoteStrings',true);
     repr = strcat('pd.read_csv(''', tempdir, 'tab2py.csv''', ')');
+    if ~isempty(cats)
+        repr = ['categorical_columns(', repr, ',{', cats, '})'];
+    end
+    if ~isempty(temporals)
+        save('-v6', fullfile(tempdir, 'tab2py.mat'), '-struct', 'ticks');
+        repr = ['temporal_columns(', repr, ',r''', fullfile(tempdir, 'tab2py.mat'), ''',{', temporals, '})'];
+    end
     else
         % unrecognized/unsupported datatype is transferred from
         % matlab to Python as string "Unsupported datatype"
@@ -0,0 +1,5 @@
+function sos_save_block (filename, obj, varargin)
+% Save block obj(varargin{:}) of an array to filename, so that remote array
+% handles in SoS only transfer the part of the array that is indexed.
+obj = obj(varargin{:});
+save('-v6', filename, 'obj');
@@ -0,0 +1,40 @@
+function [repr] = sos_symbolic_repr (obj)
+% Return a compact Python expression for real numeric arrays that are constant,
+% vectors of arithmetic progressions with integer start and step, or multiples
+% of identity matrices, or '' if obj does not follow any of these patterns.
+repr = '';
+if ~isnumeric(obj) || ~isreal(obj) || numel(obj) < 3 || ~all(isfinite(obj(:)))
+    return
+end
+vals = obj(:);
+if isvector(obj)
+    % vectors are returned as 1-d arrays with types inferred from values
+    if all(vals == vals(1))
+        repr = sprintf('np.full(%d, %s)', numel(obj), num2str(vals(1), 20));
+        return
+    end
+    first = double(vals(1));
+    step = double(vals(2)) - first;
+    last = double(vals(end));
+    if first == round(first) && step == round(step) && abs(first) < flintmax && abs(last) < flintmax ...
+            && all(diff(vals) == step)
+        repr = sprintf('np.arange(%d, %d, %d)', first, last + step, step);
+    end
+    return
+end
+if strcmp(class(obj), 'double')
+    dtype = 'float64';
+elseif strcmp(class(obj), 'single')
+    dtype = 'float32';
+else
+    dtype = class(obj);
+end
+if all(vals == vals(1))
+    repr = sprintf('np.full((%s), %s, dtype=np.%s)', sprintf('%d,', size(obj)), num2str(vals(1), 20), dtype);
+elseif ismatrix(obj) && size(obj, 1) == size(obj, 2) && isdiag(obj) && all(diag(obj) == obj(1, 1))
+    repr = sprintf('%s * np.eye(%d, dtype=np.%s)', num2str(obj(1, 1), 20), size(obj, 1), dtype);
+end
+% matrices are returned as np.matrix
+if ~isempty(repr) && ismatrix(obj)
+    repr = ['np.matrix(', repr, ')'];
+end
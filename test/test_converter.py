@@ -1,3 +1,4 @@
+import os
 import subprocess
 
 
@@ -12,3 +13,30 @@ def test_script_to_notebook(sample_m_script):
     assert 0 == subprocess.call(
         f'sos convert {sample_m_script} {sample_m_script[:-2]}.ipynb --use-sos --kernel=matlab',
         shell=True)
+
+
+def test_batch_script_to_notebook(sample_m_script):
+    '''Test sos convert of multiple scripts with a pattern'''
+    assert 0 == subprocess.call(
+        'sos convert "temp/*.m" temp/notebooks --to ipynb -j 2', shell=True)
+    assert os.path.isfile('temp/notebooks/script.ipynb')
+    mtime = os.path.getmtime('temp/notebooks/script.ipynb')
+    # unchanged script is not converted again
+    assert 0 == subprocess.call(
+        'sos convert "temp/*.m" temp/notebooks --to ipynb', shell=True)
+    assert mtime == os.path.getmtime('temp/notebooks/script.ipynb')
+    # changed options trigger conversion
+    assert 0 == subprocess.call(
+        'sos convert "temp/*.m" temp/notebooks --to ipynb --use-sos', shell=True)
+    assert mtime != os.path.getmtime('temp/notebooks/script.ipynb')
+
+
+def test_recursive_script_to_notebook(sample_m_script):
+    '''Test sos convert of all scripts under a directory with a recursive pattern'''
+    os.makedirs('temp/sub', exist_ok=True)
+    with open('temp/sub/other.m', 'w') as script:
+        script.write('c = 5\n')
+    assert 0 == subprocess.call(
+        'sos convert "temp/**/*.m" temp/notebooks --to ipynb', shell=True)
+    assert os.path.isfile('temp/notebooks/script.ipynb')
+    assert os.path.isfile('temp/notebooks/sub/other.ipynb')
@@ -213,3 +213,122 @@ class TestMATLABDataExchange(NotebookTest):
             kernel='SoS')
         output = notebook.check_output('df', kernel='MATLAB')
         assert '4x3 table' in output and 'Michelangelo' in output
+
+    def test_get_categorical(self, notebook):
+        notebook.call(
+            '''\
+            %put cat_df --to MATLAB
+            import pandas as pd
+            cat_df = pd.DataFrame({'val': [1, 2, 3], 'label': pd.Categorical(['a', 'b', 'a'])})
+            ''',
+            kernel='SoS')
+        output = notebook.check_output('disp(class(cat_df.label))', kernel='MATLAB')
+        assert 'categorical' == output
+        assert ['a', 'b'] == notebook.check_output(
+            'disp(strjoin(categories(cat_df.label)))', kernel='MATLAB').split()
+
+    def test_get_categorical_series(self, notebook):
+        notebook.call(
+            '''\
+            %put cat_series --to MATLAB
+            import pandas as pd
+            cat_series = pd.Series(pd.Categorical(['ab', 'c', 'ab']))
+            ''',
+            kernel='SoS')
+        assert ['categorical', '3', '1', 'c'] == notebook.check_output(
+            'disp(class(cat_series)); disp(size(cat_series)); disp(char(cat_series(2)))',
+            kernel='MATLAB').split()
+
+    def test_get_nested(self, notebook):
+        notebook.call(
+            '''\
+            %put nested_var --to MATLAB
+            import numpy as np
+            import pandas as pd
+            nested_var = {'df': pd.DataFrame({'val': [1.5, 2.5], 'label': ['a', 'b']}),
+                          'arrays': [np.ones((2, 3)), np.zeros((4, 1))], 'flag': True, 'missing': None}
+            ''',
+            kernel='SoS')
+        assert ['table', '2', '3', 'logical', '1'] == notebook.check_output(
+            '''\
+            disp(class(nested_var.df)); disp(size(nested_var.arrays{1}))
+            disp(class(nested_var.flag)); disp(isnan(nested_var.missing))
+            ''', kernel='MATLAB').split()
+
+    def test_put_categorical(self, notebook):
+        notebook.call(
+            '''\
+            %put cat_tbl
+            cat_tbl = table([1;2;3], categorical({'x';'y';'x'}), 'VariableNames', {'val', 'label'})
+            ''',
+            kernel='MATLAB')
+        assert 'category' == notebook.check_output(
+            'print(cat_tbl["label"].dtype)', kernel='SoS')
+        assert "['x', 'y', 'x']" == notebook.check_output(
+            'print(list(cat_tbl["label"]))', kernel='SoS')
+
+    def test_get_datetime(self, notebook):
+        notebook.call(
+            '''\
+            %put dt_df --to MATLAB
+            import pandas as pd
+            dt_df = pd.DataFrame({'time': pd.to_datetime(['2020-01-02 03:04:05', None]),
+                'span': pd.to_timedelta([90, 30], unit='s')})
+            ''',
+            kernel='SoS')
+        assert 'datetime' == notebook.check_output('disp(class(dt_df.time))', kernel='MATLAB')
+        assert '2020' == notebook.check_output('disp(year(dt_df.time(1)))', kernel='MATLAB')
+        assert '1' == notebook.check_output('disp(isnat(dt_df.time(2)))', kernel='MATLAB')
+        assert '90' == notebook.check_output('disp(seconds(dt_df.span(1)))', kernel='MATLAB')
+
+    def test_get_datetime_series(self, notebook):
+        notebook.call(
+            '''\
+            %put dt_series dt_index --to MATLAB
+            import pandas as pd
+            dt_series = pd.Series(pd.to_datetime(['2020-01-02 03:04:05', None]))
+            dt_index = pd.timedelta_range('90s', periods=2)
+            ''',
+            kernel='SoS')
+        assert 'datetime' == notebook.check_output('disp(class(dt_series))', kernel='MATLAB')
+        assert '2020' == notebook.check_output('disp(year(dt_series(1)))', kernel='MATLAB')
+        assert '1' == notebook.check_output('disp(isnat(dt_series(2)))', kernel='MATLAB')
+        assert '90' == notebook.check_output('disp(seconds(dt_index(1)))', kernel='MATLAB')
+
+    def test_put_datetime(self, notebook):
+        notebook.call(
+            '''\
+            %put dt_tbl
+            dt_tbl = table(datetime(2020, 1, 2, 3, 4, 5), seconds(90), 'VariableNames', {'time', 'span'})
+            ''',
+            kernel='MATLAB')
+        assert 'datetime64[ns]' == notebook.check_output(
+            'print(dt_tbl["time"].dtype)', kernel='SoS')
+        assert '2020-01-02 03:04:05' == notebook.check_output(
+            'print(dt_tbl["time"][0])', kernel='SoS')
+        assert '90.0' == notebook.check_output(
+            'print(dt_tbl["span"][0].total_seconds())', kernel='SoS')
+
+    def test_get_series(self, notebook):
+        notebook.call(
+            '''\
+            %put series_var --to MATLAB
+            import pandas as pd
+            series_var = pd.Series([1, 2, 3])
+            ''',
+            kernel='SoS')
+        assert ['3', '1', 'int64'] == notebook.check_output(
+            'disp(size(series_var)); disp(class(series_var))', kernel='MATLAB').split()
+        notebook.call(
+            '''\
+            %put series_var --to MATLAB
+            from sos_matlab.kernel import sos_MATLAB
+            sos_MATLAB.options['series_format'] = 'table'
+            series_var = pd.Series([1.5, 2.5], name='val', index=['a', 'b'])
+            ''',
+            kernel='SoS')
+        try:
+            output = notebook.check_output('disp(series_var)', kernel='MATLAB')
+            assert 'val' in output and 'a' in output and '2.5' in output
+        finally:
+            notebook.call("sos_MATLAB.options['series_format'] = 'vector'", kernel='SoS')
@@ -79,3 +79,12 @@ class TestMATLABInterface(NotebookTest):
         '''test support for %sessioninfo'''
         notebook.call("disp('this is MATLAB')", kernel="MATLAB")
         assert 'MATLAB' in notebook.check_output('%sessioninfo', kernel="SoS")
+
+    def test_capabilities(self, notebook):
+        '''test probing of MATLAB features'''
+        caps = eval(notebook.check_output('disp(sos_capabilities())', kernel="MATLAB"))
+        assert {'v73', 'memmapfile', 'struct2table', 'string', 'istable', 'categorical', 'datetime'} == set(caps)
+        assert caps["istable"]
+        # session info is cached with capabilities
+        assert notebook.check_output('%sessioninfo', kernel="SoS") == notebook.check_output(
+            '%sessioninfo', kernel="SoS")
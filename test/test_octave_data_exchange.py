@@ -137,6 +137,33 @@ class TestOctaveDataExchange(NotebookTest):
         output = self.get_from_SoS(notebook, "{1.5, 'abc'}")
         assert '1.5' in output or abc in output
 
+    def test_get_nested(self, notebook):
+        notebook.call(
+            '''\
+            %put nested_var --to Octave
+            import numpy as np
+            nested_var = {'a': np.random.rand(2, 3), 'b': [np.arange(4.5), 'text'], 'c': None}
+            ''',
+            kernel='SoS')
+        assert ['2', '3', '1', '5', 'text', '1'] == notebook.check_output(
+            '''\
+            disp(size(nested_var.a)); disp(size(nested_var.b{1}))
+            disp(nested_var.b{2}); disp(isnan(nested_var.c))
+            ''', kernel='Octave').split()
+
+    def test_get_dict_list(self, notebook):
+        # lists in dicts are row vectors and cells, as top-level lists are columns
+        notebook.call(
+            '''\
+            %put dict_list --to Octave
+            import numpy as np
+            dict_list = {'a': [1, 2, 3], 'b': [np.ones(2), 'text'], 'c': [4, 5]}
+            ''',
+            kernel='SoS')
+        assert ['1', '3', '1', '2', '1', '2'] == notebook.check_output(
+            'disp(size(dict_list.a)); disp(size(dict_list.b)); disp(size(dict_list.c))',
+            kernel='Octave').split()
+
     def test_get_complex(self, notebook):
         assert "1.0000 + 2.2000i" == self.get_from_SoS(notebook,
                                                        "complex(1, 2.2)")
@@ -205,3 +232,267 @@ class TestOctaveDataExchange(NotebookTest):
             kernel='SoS')
         output = notebook.check_output('df', kernel='Octave')
         assert 'dataframe' in output and '4 rows' in output and '3 columns' in output and 'Michelangelo' in output
+
+    def test_put_remote_array(self, notebook):
+        notebook.call(
+            '''\
+            from sos_matlab.kernel import sos_MATLAB
+            sos_MATLAB.options['remote_array_size'] = 1000
+            ''',
+            kernel='SoS')
+        notebook.call(
+            '''\
+            %put remote_var
+            remote_var = reshape(1:6000, 20, 30, 10);
+            ''',
+            kernel='Octave')
+        try:
+            assert 'MatlabArray' in notebook.check_output('print(type(remote_var).__name__)', kernel='SoS')
+            assert '(20, 30, 10) float64' == notebook.check_output(
+                'print(remote_var.shape, remote_var.dtype)', kernel='SoS')
+            assert '[[ 22. 622.]]' == notebook.check_output('print(remote_var[1:2, 1, 0:2])', kernel='SoS')
+        finally:
+            notebook.call("sos_MATLAB.options['remote_array_size'] = None", kernel='SoS')
+
+    def test_get_delta_array(self, notebook):
+        notebook.call(
+            '''\
+            from sos_matlab.kernel import sos_MATLAB
+            import numpy as np
+            sos_MATLAB.options['delta_transfer'] = True
+            sos_MATLAB.options['delta_block_size'] = 100
+            delta_var = np.zeros([50, 40])
+            ''',
+            kernel='SoS')
+        try:
+            notebook.call('%get delta_var', kernel='Octave')
+            notebook.call('delta_var[10, 20] = 5', kernel='SoS')
+            assert '5' == notebook.check_output(
+                '''\
+                %get delta_var
+                disp(delta_var(11, 21))
+                ''',
+                kernel='Octave')
+            assert '5' == notebook.check_output('disp(sum(delta_var(:)))', kernel='Octave')
+            # the variable is sent in full if it has been changed in MATLAB
+            notebook.call('delta_var = delta_var * 2 + 1;', kernel='Octave')
+            notebook.call('delta_var[0, 0] = 1', kernel='SoS')
+            assert '6' == notebook.check_output(
+                '''\
+                %get delta_var
+                disp(sum(delta_var(:)))
+                ''',
+                kernel='Octave')
+        finally:
+            notebook.call("sos_MATLAB.options['delta_transfer'] = False", kernel='SoS')
+
+    def test_get_categorical_series(self, notebook):
+        # categorical values are sent as strings without categorical support
+        notebook.call(
+            '''\
+            %put cat_series --to Octave
+            import pandas as pd
+            cat_series = pd.Series(pd.Categorical(['ab', 'c', 'ab']))
+            ''',
+            kernel='SoS')
+        assert ['cell', '3', '1', 'c'] == notebook.check_output(
+            'disp(class(cat_series)); disp(size(cat_series)); disp(cat_series{2})',
+            kernel='Octave').split()
+
+    def test_get_iterator(self, notebook):
+        assert '0\n1\n4\n9' == self.get_from_SoS(notebook, '(x * x for x in range(4))').replace(' ', '')
+        notebook.call('gen_var = map(float, range(100000))', kernel='SoS')
+        assert ['100000', '1', '4999950000'] == notebook.check_output(
+            '''\
+            %get gen_var
+            disp(size(gen_var)); disp(sum(gen_var))
+            ''',
+            kernel='Octave').split()
+        notebook.call('iter_tuple = (iter([1, 2]), iter([3, 4]))', kernel='SoS')
+        assert ['3', '7'] == notebook.check_output(
+            '''\
+            %get iter_tuple
+            disp(sum(iter_tuple{1})); disp(sum(iter_tuple{2}))
+            ''',
+            kernel='Octave').split()
+        notebook.call('iter_str = map(str, range(11))', kernel='SoS')
+        assert ['cell', '11', '1', '10'] == notebook.check_output(
+            '''\
+            %get iter_str
+            disp(class(iter_str)); disp(size(iter_str)); disp(iter_str{end})
+            ''',
+            kernel='Octave').split()
+
+    def test_get_bytes(self, notebook):
+        notebook.call("bytes_var = b'abc'", kernel='SoS')
+        assert ['uint8', '3', '1', '98'] == notebook.check_output(
+            '''\
+            %get bytes_var
+            disp(class(bytes_var)); disp(size(bytes_var)); disp(bytes_var(2))
+            ''',
+            kernel='Octave').split()
+        notebook.call("bytes_list = [b'ab', b'cd']", kernel='SoS')
+        assert ['97', '99'] == notebook.check_output(
+            '''\
+            %get bytes_list
+            disp(bytes_list{1}(1)); disp(bytes_list{2}(1))
+            ''',
+            kernel='Octave').split()
+
+    def test_put_uint8(self, notebook):
+        assert "b'abc'" == self.put_to_SoS(notebook, 'uint8([97 98 99])')
+        assert 'dtype=uint8' in self.put_to_SoS(notebook, 'uint8([1 2; 3 4])')
+        # arrays in structs are read from separate files after sos_py_repr returns
+        assert "{'a': b'\\x01\\x02\\x03', 'b': b'\\x04\\x05\\x06'}" == self.put_to_SoS(
+            notebook, "struct('a', uint8([1 2 3]), 'b', uint8([4 5 6]))")
+        notebook.call(
+            '''\
+            %put uint8_struct
+            uint8_struct = struct('a', uint8(mod(0:299, 256)), 'b', uint8(mod(1:300, 256)))
+            ''',
+            kernel='Octave')
+        assert '0 1' == notebook.check_output(
+            "print(uint8_struct['a'][0], uint8_struct['b'][0])", kernel='SoS')
+
+    def test_get_symbolic(self, notebook):
+        notebook.call('range_var = range(10000000)', kernel='SoS')
+        assert ['10000000', '1', '9999999'] == notebook.check_output(
+            '''\
+            %get range_var
+            disp(size(range_var)); disp(range_var(end))
+            ''',
+            kernel='Octave').split()
+        notebook.call('import numpy as np', kernel='SoS')
+        assert '2  2  2' == self.get_from_SoS(notebook, 'np.full(3, 2)')
+        # descending unsigned progressions
+        assert '10  8  6  4  2' == self.get_from_SoS(notebook, 'np.arange(10, 0, -2, dtype=np.uint32)')
+
+    def test_put_symbolic(self, notebook):
+        assert 'array([1, 2, 3, 4, 5])' == self.put_to_SoS(notebook, '1:5')
+        assert 'array([7, 7, 7])' == self.put_to_SoS(notebook, '[7 7 7]')
+        output = self.put_to_SoS(notebook, '2 * eye(3)')
+        assert 'matrix' in output and '[2., 0., 0.]' in output
+
+    def test_get_fortran_array(self, notebook):
+        notebook.call(
+            '''\
+            %put f_var --to Octave
+            import numpy as np
+            f_var = np.asfortranarray(np.arange(24).reshape(2, 3, 4))
+            ''',
+            kernel='SoS')
+        assert ['2', '3', '4', '23'] == notebook.check_output(
+            'disp(size(f_var)); disp(f_var(2, 3, 4))', kernel='Octave').split()
+        notebook.call('half_var = np.asfortranarray(np.full((2, 3), 1.5, dtype=np.float16))', kernel='SoS')
+        assert ['2', '3', '1.5000'] == notebook.check_output(
+            '''\
+            %get half_var
+            disp(size(half_var)); disp(half_var(2, 3))
+            ''',
+            kernel='Octave').split()
+
+    def test_put_array_order(self, notebook):
+        notebook.call(
+            '''\
+            %put order_var
+            order_var = reshape(1:24, 2, 3, 4) + 0.5;
+            ''',
+            kernel='Octave')
+        assert 'True 23.5' == notebook.check_output(
+            'print(order_var.flags.c_contiguous, order_var[0, 2, 3])', kernel='SoS')
+        notebook.call(
+            '''\
+            from sos_matlab.kernel import sos_MATLAB
+            sos_MATLAB.options['array_order'] = 'F'
+            ''',
+            kernel='SoS')
+        try:
+            notebook.call('%put order_var', kernel='Octave')
+            assert 'True 23.5' == notebook.check_output(
+                'print(order_var.flags.f_contiguous, order_var[0, 2, 3])', kernel='SoS')
+        finally:
+            notebook.call("sos_MATLAB.options['array_order'] = 'C'", kernel='SoS')
+
+    def test_put_unchanged(self, notebook):
+        notebook.call(
+            '''\
+            from sos_matlab.kernel import sos_MATLAB
+            sos_MATLAB.options['reuse_unchanged'] = True
+            ''',
+            kernel='SoS')
+        try:
+            notebook.call(
+                '''\
+                %put same_var
+                same_var = rand(100, 100);
+                ''',
+                kernel='Octave')
+            notebook.call('same_var_id = id(same_var)', kernel='SoS')
+            notebook.call('%put same_var', kernel='Octave')
+            assert 'True' == notebook.check_output('print(id(same_var) == same_var_id)', kernel='SoS')
+            notebook.call(
+                '''\
+                %put same_var
+                same_var(1, 1) = 2;
+                ''',
+                kernel='Octave')
+            assert 'False 2.0' == notebook.check_output(
+                'print(id(same_var) == same_var_id, same_var[0, 0])', kernel='SoS')
+        finally:
+            notebook.call("sos_MATLAB.options['reuse_unchanged'] = False", kernel='SoS')
+
+    def test_transfer_budget(self, notebook):
+        notebook.call(
+            '''\
+            %put budget_var --to Octave
+            import numpy as np
+            from sos_matlab.kernel import sos_MATLAB
+            sos_MATLAB.options['transfer_budget'] = 10000
+            budget_var = np.arange(24000).reshape(40, 600)
+            ''',
+            kernel='SoS')
+        assert ['40', '600', '23999'] == notebook.check_output(
+            'disp(size(budget_var)); disp(budget_var(40, 600))', kernel='Octave').split()
+        # rows of tall arrays are larger than the budget
+        notebook.call('%put budget_tall --to Octave\nbudget_tall = np.arange(24000).reshape(12000, 2)', kernel='SoS')
+        assert ['12000', '2', '23998'] == notebook.check_output(
+            'disp(size(budget_tall)); disp(budget_tall(12000, 1))', kernel='Octave').split()
+        notebook.call(
+            '''\
+            %put budget_mat
+            budget_mat = rand(100, 100);
+            ''',
+            kernel='Octave')
+        assert 'MatlabArray' == notebook.check_output(
+            '''\
+            sos_MATLAB.options['transfer_budget'] = None
+            print(type(budget_mat).__name__)
+            ''', kernel='SoS')
+
+    def test_get_inline(self, notebook):
+        notebook.call(
+            '''\
+            %put inline_var --to Octave
+            import numpy as np
+            inline_var = {'arr': np.array([[0.1, 1 / 3], [2.5, np.pi]]), 'n': np.int16(3), 'flag': False}
+            ''',
+            kernel='SoS')
+        assert ['1', 'int16', 'logical'] == notebook.check_output(
+            '''\
+            disp(inline_var.arr(2, 1) == 2.5 && inline_var.arr(2, 2) == pi)
+            disp(class(inline_var.n)); disp(class(inline_var.flag))
+            ''', kernel='Octave').split()
+
+    def test_put_inline(self, notebook):
+        notebook.call(
+            '''\
+            %put inline_mat inline_int
+            inline_mat = [pi exp(1); 1/3 0.1];
+            inline_int = int32([1 2; 3 4]);
+            ''',
+            kernel='Octave')
+        assert 'True int32 3' == notebook.check_output(
+            '''\
+            import math
+            print(inline_mat[0, 0] == math.pi and inline_mat[1, 0] == 1 / 3, inline_int.dtype, inline_int[1, 0])
+            ''', kernel='SoS')
@@ -79,3 +79,56 @@ class TestOctaveInterface(NotebookTest):
         '''test support for %sessioninfo'''
         notebook.call("disp('this is Octave')", kernel="Octave")
         assert 'Octave' in notebook.check_output('%sessioninfo', kernel="SoS")
+
+    def test_capabilities(self, notebook):
+        '''test probing of Octave features'''
+        caps = eval(notebook.check_output('disp(sos_capabilities())', kernel="Octave"))
+        assert {'v73', 'memmapfile', 'struct2table', 'string', 'istable', 'categorical', 'datetime'} == set(caps)
+        assert not caps["v73"]
+        # session info is cached with capabilities
+        assert notebook.check_output('%sessioninfo', kernel="SoS") == notebook.check_output(
+            '%sessioninfo', kernel="SoS")
+
+    def test_checkpoint(self, notebook):
+        '''test incremental checkpoint and restore of workspace'''
+        ckpt = os.path.join(tempfile.gettempdir(), 'octave_ckpt.mat')
+        for f in (ckpt, ckpt[:-4] + '.fingerprints.mat'):
+            if os.path.isfile(f):
+                os.remove(f)
+        notebook.call('ckpt_a = rand(10, 10); ckpt_b = {1, "b"};', kernel="Octave")
+        assert 'ckpt_a' in notebook.check_output(
+            f"disp(sos_checkpoint('{ckpt}', 'ckpt_a', 'ckpt_b'))", kernel="Octave")
+        notebook.call('ckpt_b = {1, "c"};', kernel="Octave")
+        output = notebook.check_output(
+            f"disp(sos_checkpoint('{ckpt}', 'ckpt_a', 'ckpt_b'))", kernel="Octave")
+        assert 'ckpt_b' in output and 'ckpt_a' not in output
+        notebook.call('total = sum(ckpt_a(:)); clear ckpt_a ckpt_b', kernel="Octave")
+        assert '1 c' == notebook.check_output(
+            f"load('{ckpt}'); disp(abs(total - sum(ckpt_a(:))) < 1e-10); disp(ckpt_b{{2}})",
+            kernel="Octave").replace('\n', ' ')
+
+    def test_warm_pool(self, notebook):
+        '''test starting Octave from warm pool'''
+        notebook.call(
+            '''\
+            import os
+            import time
+            from sos_matlab.kernel import sos_MATLAB
+            from sos_matlab.pool import warm_pool
+            sos_MATLAB.options['warm_pool'] = {'octave': 1}
+            sos_MATLAB.resize_pool()
+            while not warm_pool.ready('octave'):
+                time.sleep(1)
+            ''',
+            kernel="SoS")
+        notebook.call('%shutdown Octave', kernel="SoS")
+        cwd = notebook.check_output('print(os.getcwd())', kernel="SoS")
+        # the kernel from the pool is initialized and moved to the working directory
+        assert cwd == notebook.check_output('disp(pwd())', kernel="Octave")
+        assert 'sos_py_repr' in notebook.check_output("disp(which('sos_py_repr'))", kernel="Octave")
+        notebook.call(
+            '''\
+            sos_MATLAB.options['warm_pool'] = {'octave': 0}
+            sos_MATLAB.resize_pool()
+            ''',
+            kernel="SoS")